@@ -2,16 +2,25 @@
 MindMate AI Agents
 """
 
-from .chatbot_agent import ChatbotAgent, convert_messages_to_langchain
+from .chatbot_agent import ChatbotAgent, convert_messages_to_langchain, get_llm
 from .crisis_detector import CrisisDetector
 from .sentiment_analyzer import SentimentAnalyzer
-from .mindmate_graph import MindMateGraph
+from .mindmate_graph import MindMateGraph, get_mindmate_graph
+from .semantic_cache import SemanticCache
+from .storage import InMemoryStorage, RedisStorage, Storage, create_storage
 
 __all__ = [
     "ChatbotAgent",
     "CrisisDetector",
     "SentimentAnalyzer",
     "MindMateGraph",
+    "SemanticCache",
+    "Storage",
+    "InMemoryStorage",
+    "RedisStorage",
     "convert_messages_to_langchain",
+    "get_llm",
+    "get_mindmate_graph",
+    "create_storage",
 ]
 
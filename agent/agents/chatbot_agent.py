@@ -2,156 +2,292 @@
 LangChain을 사용한 챗봇 에이전트
 """
 
-from typing import List, Optional, TypedDict, Annotated
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, TypedDict, Annotated
 from datetime import datetime
 
+import httpx
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 import operator
 
+from .prompts import SYSTEM_PROMPT, INITIAL_QUESTION_PROMPT, INITIAL_QUESTION_SYSTEM_PROMPT
+from .semantic_cache import SemanticCache, context_key
+
+
+# 선택적 의존성: h2가 설치되어 있으면 HTTP/2로 여러 요청을 하나의 연결에 다중화
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# OpenAI 연결 풀 설정 (모든 ChatOpenAI 클라이언트가 하나의 풀을 공유)
+# 종료 시에는 클라이언트가 아니라 전송 계층의 연결만 닫아, 같은 프로세스에서 앱이 다시 시작되어도
+# get_llm()으로 만든 인스턴스가 그대로 새 연결을 열 수 있도록 함
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TRANSPORT = httpx.HTTPTransport(limits=HTTP_LIMITS, http2=HTTP2_ENABLED)
+HTTP_ASYNC_TRANSPORT = httpx.AsyncHTTPTransport(limits=HTTP_LIMITS, http2=HTTP2_ENABLED)
+HTTP_CLIENT = httpx.Client(transport=HTTP_TRANSPORT)
+HTTP_ASYNC_CLIENT = httpx.AsyncClient(transport=HTTP_ASYNC_TRANSPORT)
+
+
+@lru_cache(maxsize=8)
+def get_llm(model_name: str = "gpt-4o-mini", temperature: float = 0.7) -> ChatOpenAI:
+    """(모델, temperature)별로 공유되는 ChatOpenAI 클라이언트
+
+    모든 인스턴스가 같은 HTTP 연결 풀을 사용하여 keep-alive 연결을 재사용하고 TLS 핸드셰이크를 줄입니다.
+    """
+    return ChatOpenAI(
+        model=model_name,
+        temperature=temperature,
+        http_client=HTTP_CLIENT,
+        http_async_client=HTTP_ASYNC_CLIENT,
+    )
+
+
+async def awarmup_http_clients(timeout: float = 10.0) -> None:
+    """1토큰짜리 요청으로 DNS 조회와 TLS 핸드셰이크를 미리 수행하여 공유 연결 풀에 keep-alive 연결 확보"""
+    await asyncio.wait_for(get_llm().ainvoke([HumanMessage(content="ok")], max_tokens=1), timeout)
+
+
+async def aclose_http_connections() -> None:
+    """공유 연결 풀의 keep-alive 연결 종료 (서버 종료 시 호출, 클라이언트는 계속 사용 가능)"""
+    HTTP_TRANSPORT.close()
+    await HTTP_ASYNC_TRANSPORT.aclose()
+
+
+# 챗봇 시스템 메시지와 출력 파서 (모든 인스턴스가 공유)
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+OUTPUT_PARSER = StrOutputParser()
+
+# 역할 문자열 -> LangChain 메시지 클래스
+_ROLE_TO_MESSAGE = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+    "system": SystemMessage,
+}
+
+# 초기 질문 생성 실패 시 사용하는 기본 질문
+DEFAULT_INITIAL_QUESTION = "요즘 기분이 어때? 편하게 이야기해줄래?"
+
+# 챗봇 프롬프트에 포함할 최대 대화 이력 수
+MAX_HISTORY_MESSAGES = 10
+
+# 챗봇 시맨틱 캐시 최대 항목 수 (초과 시 오래된 항목부터 제거)
+CHAT_CACHE_MAX_ENTRIES = 2000
+
+# 챗봇 대화 이력에 포함하는 메시지 타입
+_HISTORY_MESSAGE_TYPES = frozenset({HumanMessage, AIMessage})
 
-# 시스템 프롬프트
-SYSTEM_PROMPT = """You are a warm and empathetic counseling friend who genuinely understands and empathizes with users. Talk naturally and comfortably, like close friends who have known each other for a long time.
-
-Most important things:
-- Listen first, and genuinely acknowledge and empathize with their feelings
-- Don't give advice easily; first accept and validate the other person's emotions
-- Use warm and gentle expressions; absolutely avoid stiff or mechanical speech
-- Communicate naturally, like a conversation between real people
-
-Things you must NEVER do:
-- Absolutely avoid exclamations like "와", "와!", "오" or stiff expressions
-- Absolutely avoid mechanical or rigid speech patterns
-- Avoid exaggerated exclamations or unnatural expressions
-
-Examples of natural and gentle empathetic expressions (in Korean):
-- "그렇게 느끼는 거 이해해" (I understand how you feel)
-- "힘들었겠다, 안타깝게 생각해" (That must have been hard, I'm sorry)
-- "그럴 수 있어, 누구나 그런 때가 있지" (That's okay, everyone has those moments)
-- "네 마음 잘 알겠어" (I understand your feelings)
-- "지금 많이 힘든 게 느껴져" (I can feel you're going through a lot right now)
-- "그 감정 당연한 거야, 틀린 거 아니야" (That feeling is natural, it's not wrong)
-- "들어봤어, 계속 이야기해줘" (I'm listening, keep talking)
-
-Speech style:
-- Use polite but warm and natural language, like a close friend you've known for a long time
-- Use "너" (you) and comfortable endings like "~해줄래?", "~지?", "~네", "~어"
-- Don't judge or evaluate; focus on acknowledging and understanding emotions
-- When advice is needed, give it naturally and warmly, like a friendly counselor
-
-Response style:
-- Absolutely avoid clichéd or stiff empathetic expressions
-- Use warm and natural speech, like a close friend comforting them
-- Keep it concise and to the point
-- In crisis situations, respond seriously but still maintain warm and gentle tone
-- Be professional yet friendly and comfortable, like a counselor
-
-Special guidelines for crisis situations (suicidal thoughts, expressions of wanting to die, etc.):
-- Never say things like "희망을 주지 마" (don't give hope) or "일으켜 세우지 마" (don't lift them up); instead, warmly comfort them and help them find meaning in small things
-- Deliver direct and warm messages like "죽지 마" (don't die), "오늘은 죽지 마" (don't die today)
-- Let them know it's okay not to live perfectly. Tell them that things that sway are beautiful, and if they sway, let them sway
-- Help them find meaning in small things: the smell of freshly dried laundry, a favorite song, the smell of shampoo - small everyday things
-- Present concrete and achievable goals like "한 시간만 더 살아보자" (let's live one more hour), "하루만 더 살아보자" (let's live one more day)
-- Deliver the message that "지나가면 진짜 아무것도 아냐" (when it passes, it's really nothing), but warmly, not preachy
-- Deliver the message "내가 너를 믿어줄게" (I'll believe in you)
-- Comfort them that even when everything seems dark, it's just like wearing cool sunglasses
-- Naturally mention that rainbows need to be curved to be rainbows, and they always appear after rain
-- Tell them to wait for small fortunes to come
-- Deliver even clichéd words warmly and sincerely, as if asking them to listen
-
-IMPORTANT: Always respond in Korean. Use natural, warm Korean language throughout your responses.
-"""
 
-# 초기 질문 생성 프롬프트
-INITIAL_QUESTION_PROMPT = """Based on the user's existing records, create an initial question naturally, like a warm and gentle counseling friend.
+def _role_and_content(msg) -> Tuple[str, str]:
+    """대화 이력 항목에서 역할과 내용 추출
 
-User information:
-- Average emotion score: {avg_score}
-- Recent trend: {trend}
-- Last record: {last_mood}
-- Frequently mentioned topics: {topics}
+    role/content 키를 가진 dict와 role/content 속성을 가진 객체(API 요청의 ChatMessage 등)를
+    모두 지원하여, 호출하는 쪽에서 dict로 다시 변환하지 않아도 되도록 합니다.
+    """
+    if isinstance(msg, dict):
+        return msg.get("role", ""), msg.get("content", "")
+    return getattr(msg, "role", ""), getattr(msg, "content", "")
 
-Generation requirements:
-1. Absolutely avoid exclamations like "와", "와!" or stiff expressions
-2. Be gentle and natural, like a close friend asking
-3. Start with a warm tone that acknowledges and empathizes with the user's state
-4. Don't easily say "괜찮아질 거야" (it will be okay); maintain an attitude of listening and understanding first
-5. Keep it concise, one or two sentences
-6. Use natural and gentle expressions like "요즘 어때?" (how have you been?), "무슨 일 있어?" (what's going on?), "편하게 이야기해줄래?" (can you talk comfortably?)
 
-Generate the initial question in Korean:"""
+def _format_chat_messages(x: dict) -> List[BaseMessage]:
+    """챗봇 입력을 LLM 메시지 목록으로 구성
+
+    프롬프트 구조가 고정되어 있으므로 템플릿 렌더링 없이 공유 시스템 메시지,
+    대화 이력, 사용자 메시지를 바로 이어 붙입니다.
+    """
+    return [SYSTEM_MESSAGE, *x.get("chat_history", []), HumanMessage(content=x["input"])]
 
 
 class ChatbotAgent:
     """LangChain을 사용한 챗봇 에이전트"""
 
-    def __init__(self, model_name: str = "gpt-4o-mini", temperature: float = 0.7):
-        self.llm = ChatOpenAI(model=model_name, temperature=temperature)
-        self.memory = ChatMessageHistory()
-
-        # 프롬프트 템플릿 설정
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", SYSTEM_PROMPT),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}"),
-            ]
-        )
+    def __init__(
+        self,
+        model_name: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        semantic_cache: Optional[SemanticCache] = None,
+    ):
+        self.llm = get_llm(model_name, temperature)
+        self.semantic_cache = semantic_cache or SemanticCache(max_entries=CHAT_CACHE_MAX_ENTRIES)
 
-        # 체인 구성
-        def get_chat_history(x):
-            messages = self.memory.messages[-10:]
-            return messages if messages else []
-        
+        # 체인 구성 (대화 이력은 요청마다 입력으로 전달, 인스턴스별로는 llm만 바인딩)
         self.chain = (
-            RunnablePassthrough.assign(
-                chat_history=get_chat_history
-            )
-            | self.prompt
+            RunnableLambda(_format_chat_messages)
             | self.llm
-            | StrOutputParser()
+            | OUTPUT_PARSER
         )
 
+    @staticmethod
+    def _build_chat_history(
+        conversation_history: Optional[List[BaseMessage]],
+    ) -> List[BaseMessage]:
+        """대화 이력에서 체인에 전달할 최근 사용자/AI 메시지 추출
+
+        요청마다 새 목록을 만들어 동시 요청끼리 상태를 공유하지 않도록 합니다.
+        """
+        if not conversation_history:
+            return []
+
+        # 뒤에서부터 필요한 10개만 변환 (전체 이력을 변환한 뒤 자르지 않음)
+        history: List[BaseMessage] = []
+        for msg in reversed(conversation_history):
+            if isinstance(msg, BaseMessage):
+                if type(msg) not in _HISTORY_MESSAGE_TYPES:
+                    continue
+            else:
+                role, content = _role_and_content(msg)
+                message_class = _ROLE_TO_MESSAGE.get(role)
+                if message_class not in _HISTORY_MESSAGE_TYPES:
+                    continue
+                msg = message_class(content=content)
+
+            history.append(msg)
+            if len(history) == MAX_HISTORY_MESSAGES:
+                break
+
+        history.reverse()
+        return history
+
+    def _lookup_cache(
+        self, user_message: str, chat_history: List[BaseMessage]
+    ) -> tuple[Optional[str], object, str]:
+        """시맨틱 캐시 조회
+
+        Args:
+            user_message: 사용자 메시지
+            chat_history: _build_chat_history()로 만든, LLM에 함께 전달할 대화 이력
+
+        Returns:
+            (cached_response, embedding, context): 캐시된 응답(없으면 None)과 저장용 키
+        """
+        if not self.semantic_cache.enabled:
+            return None, None, ""
+
+        cache_context = context_key(chat_history)
+        cache_embedding = self.semantic_cache.embed(user_message)
+        cached_response = self.semantic_cache.lookup(cache_embedding, cache_context)
+        return cached_response, cache_embedding, cache_context
+
+    async def _alookup_cache(
+        self, user_message: str, chat_history: List[BaseMessage]
+    ) -> tuple[Optional[str], object, str]:
+        """시맨틱 캐시 조회 (임베딩 계산과 인덱스 검색은 스레드에서 실행하여 이벤트 루프를 막지 않음)"""
+        if not self.semantic_cache.enabled:
+            return None, None, ""
+        return await asyncio.to_thread(self._lookup_cache, user_message, chat_history)
+
+    async def _aadd_cache(self, embedding, user_message: str, response: str, context: str):
+        """새 응답을 시맨틱 캐시에 저장 (인덱스 갱신과 주기적 디스크 저장은 스레드에서 실행)"""
+        if embedding is not None:
+            await asyncio.to_thread(self.semantic_cache.add, embedding, user_message, response, context)
+
     def get_response(
         self, user_message: str, conversation_history: Optional[List[BaseMessage]] = None
     ) -> str:
         """사용자 메시지에 대한 응답 생성"""
         try:
-            # 메모리 초기화 (새로운 대화를 위해)
-            self.memory.clear()
-            
-            # 대화 이력이 있으면 메모리에 추가
-            if conversation_history:
-                for msg in conversation_history:
-                    if isinstance(msg, dict):
-                        if msg.get("role") == "user":
-                            self.memory.add_user_message(
-                                msg.get("content", "")
-                            )
-                        elif msg.get("role") == "assistant":
-                            self.memory.add_ai_message(
-                                msg.get("content", "")
-                            )
-                    elif hasattr(msg, 'content'):
-                        # BaseMessage 객체인 경우
-                        if hasattr(msg, '__class__') and 'Human' in msg.__class__.__name__:
-                            self.memory.add_user_message(msg.content)
-                        elif hasattr(msg, '__class__') and 'AI' in msg.__class__.__name__:
-                            self.memory.add_ai_message(msg.content)
-                    else:
-                        self.memory.add_message(msg)
+            chat_history = self._build_chat_history(conversation_history)
+
+            # 시맨틱 캐시 조회 (같은 대화 이력에서 유사한 메시지에 대한 응답이 있으면 LLM 호출 생략)
+            cached_response, cache_embedding, cache_context = self._lookup_cache(
+                user_message, chat_history
+            )
+            if cached_response is not None:
+                return cached_response
 
             # 응답 생성
-            response = self.chain.invoke({"input": user_message})
+            response = self.chain.invoke({
+                "input": user_message,
+                "chat_history": chat_history,
+            })
+
+            if cache_embedding is not None:
+                self.semantic_cache.add(cache_embedding, user_message, response, cache_context)
+
+            return response
+        except Exception as e:
+            raise Exception(f"챗봇 응답 생성 오류: {str(e)}")
+
+    async def aget_response(
+        self, user_message: str, conversation_history: Optional[List[BaseMessage]] = None
+    ) -> str:
+        """사용자 메시지에 대한 응답 생성 (비동기)"""
+        try:
+            chat_history = self._build_chat_history(conversation_history)
+            cached_response, cache_embedding, cache_context = await self._alookup_cache(
+                user_message, chat_history
+            )
+            if cached_response is not None:
+                return cached_response
+
+            response = await self.chain.ainvoke({
+                "input": user_message,
+                "chat_history": chat_history,
+            })
+
+            await self._aadd_cache(cache_embedding, user_message, response, cache_context)
 
             return response
         except Exception as e:
             raise Exception(f"챗봇 응답 생성 오류: {str(e)}")
 
+    def stream_response(
+        self, user_message: str, conversation_history: Optional[List[BaseMessage]] = None
+    ) -> Iterator[str]:
+        """사용자 메시지에 대한 응답을 토큰 단위로 생성"""
+        try:
+            chat_history = self._build_chat_history(conversation_history)
+            cached_response, cache_embedding, cache_context = self._lookup_cache(
+                user_message, chat_history
+            )
+            if cached_response is not None:
+                yield cached_response
+                return
+
+            chunks = []
+            for chunk in self.chain.stream({
+                "input": user_message,
+                "chat_history": chat_history,
+            }):
+                chunks.append(chunk)
+                yield chunk
+
+            if cache_embedding is not None:
+                self.semantic_cache.add(cache_embedding, user_message, "".join(chunks), cache_context)
+        except Exception as e:
+            raise Exception(f"챗봇 응답 생성 오류: {str(e)}")
+
+    async def astream_response(
+        self, user_message: str, conversation_history: Optional[List[BaseMessage]] = None
+    ) -> AsyncIterator[str]:
+        """사용자 메시지에 대한 응답을 토큰 단위로 생성 (비동기)"""
+        try:
+            chat_history = self._build_chat_history(conversation_history)
+            cached_response, cache_embedding, cache_context = await self._alookup_cache(
+                user_message, chat_history
+            )
+            if cached_response is not None:
+                yield cached_response
+                return
+
+            chunks = []
+            async for chunk in self.chain.astream({
+                "input": user_message,
+                "chat_history": chat_history,
+            }):
+                chunks.append(chunk)
+                yield chunk
+
+            await self._aadd_cache(cache_embedding, user_message, "".join(chunks), cache_context)
+        except Exception as e:
+            raise Exception(f"챗봇 응답 생성 오류: {str(e)}")
+
     def generate_initial_question(self, user_stats: dict) -> str:
         """사용자 기록을 기반으로 초기 질문 생성
         
@@ -174,38 +310,47 @@ class ChatbotAgent:
             )
             
             response = self.llm.invoke([
-                SystemMessage(content="You are a warm and empathetic counseling friend who genuinely understands and empathizes with users. Talk naturally and comfortably, like close friends who have known each other for a long time. Absolutely avoid exclamations like '와', '와!' or stiff expressions. Focus on listening first and acknowledging emotions with a gentle and warm tone. Always respond in Korean."),
+                SystemMessage(content=INITIAL_QUESTION_SYSTEM_PROMPT),
                 HumanMessage(content=prompt_text),
             ])
             
             return response.content
         except Exception as e:
             # 기본 질문으로 폴백
-            return "요즘 기분이 어때? 편하게 이야기해줄래?"
-
-    def clear_memory(self):
-        """대화 메모리 초기화"""
-        self.memory.clear()
+            return DEFAULT_INITIAL_QUESTION
 
 
 def convert_messages_to_langchain(
-    messages: Optional[List[dict]],
+    messages: Optional[list],
+    limit: Optional[int] = None,
 ) -> List[BaseMessage]:
-    """대화 이력을 LangChain 메시지 형식으로 변환"""
+    """대화 이력을 LangChain 형식으로 변환
+
+    Args:
+        messages: role/content 키를 가진 dict 또는 role/content 속성을 가진 객체의 대화 이력
+        limit: 지정하면 마지막 limit개 메시지만 변환 (앞부분은 변환하지 않음)
+    """
     if not messages:
         return []
 
-    langchain_messages = []
-    for msg in messages:
-        role = msg.get("role", "")
-        content = msg.get("content", "")
-
-        if role == "user":
-            langchain_messages.append(HumanMessage(content=content))
-        elif role == "assistant":
-            langchain_messages.append(AIMessage(content=content))
-        elif role == "system":
-            langchain_messages.append(SystemMessage(content=content))
+    if limit is None:
+        langchain_messages = []
+        for msg in messages:
+            role, content = _role_and_content(msg)
+            message_class = _ROLE_TO_MESSAGE.get(role)
+            if message_class is not None:
+                langchain_messages.append(message_class(content=content))
+        return langchain_messages
 
-    return langchain_messages
+    # 뒤에서부터 필요한 개수만 변환
+    recent_messages = []
+    for msg in reversed(messages):
+        if len(recent_messages) == limit:
+            break
+        role, content = _role_and_content(msg)
+        message_class = _ROLE_TO_MESSAGE.get(role)
+        if message_class is not None:
+            recent_messages.append(message_class(content=content))
 
+    recent_messages.reverse()
+    return recent_messages
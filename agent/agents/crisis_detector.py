@@ -2,11 +2,17 @@
 위기 신호 감지 모듈
 """
 
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
 from typing import Tuple
 
+import ahocorasick
+
 
 # 위기 신호 키워드
-CRISIS_KEYWORDS = [
+CRISIS_KEYWORDS = (
     "죽고 싶어",
     "죽고 싶다",
     "죽고 싶습니다",
@@ -40,78 +46,157 @@ CRISIS_KEYWORDS = [
     "살아갈 수 없어",
     "더는 못 살겠어",
     "더는 못 산다",
-]
+)
+
+# 부정 감정 키워드
+NEGATIVE_WORDS = (
+    "힘들어",
+    "괴로워",
+    "괴로워요",
+    "무력해",
+    "무기력해",
+    "절망적",
+    "포기",
+    "의미없어",
+    "희망없어",
+    "망가져",
+    "버티기 힘들어",
+    "너무 힘들어",
+    "견디기 어려워",
+    "이대로는 안 될 것 같아",
+    "미치겠어",
+    "화풀이",
+    "자학",
+    "자책",
+    "죄책감",
+    "후회",
+    "나약해",
+    "나약하다",
+    "쓸모없어",
+    "쓸모없다",
+    "누가 될 자격이 없어",
+    "혼자야",
+    "혼자다",
+    "고독해",
+    "외로워",
+    "절벽",
+    "절망",
+    "끝났어",
+    "끝났다",
+    "최악이야",
+    "최악이다",
+)
+
+# 위험 수준별 권장사항
+BASE_RECOMMENDATIONS = (
+    "정신건강위기상담전화: 1393 (24시간)",
+    "응급실: 119",
+    "신뢰하는 사람에게 연락하기",
+    "가까운 정신건강복지센터 방문",
+)
+CRITICAL_RECOMMENDATIONS = (
+    "즉시 응급실(119) 또는 정신건강위기상담전화(1393)에 연락하세요",
+    "혼자 있지 마세요 - 신뢰하는 사람에게 연락하세요",
+    "자살예방상담전화: 1588-9191",
+)
+HIGH_RECOMMENDATIONS = (
+    "전문가 상담을 권장합니다",
+)
+
+# 위험 수준(low/medium/high/critical) -> 최종 권장사항 (import 시 한 번만 조합)
+RECOMMENDATIONS_BY_RISK_LEVEL = {
+    "critical": CRITICAL_RECOMMENDATIONS + BASE_RECOMMENDATIONS,
+    "high": HIGH_RECOMMENDATIONS + BASE_RECOMMENDATIONS,
+    "medium": BASE_RECOMMENDATIONS,
+    "low": BASE_RECOMMENDATIONS,
+}
+
+
+def _with_no_space(keywords: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """(원본 키워드, 공백 제거 키워드) 쌍을 한 번만 계산"""
+    return tuple(
+        (sys.intern(keyword), sys.intern(keyword.replace(" ", ""))) for keyword in keywords
+    )
+
+
+# 공백 제거 형태를 미리 계산한 키워드 쌍
+CRISIS_KEYWORDS_NOSPACE = _with_no_space(CRISIS_KEYWORDS)
+NEGATIVE_WORDS_NOSPACE = _with_no_space(NEGATIVE_WORDS)
+
+
+def _build_automaton() -> ahocorasick.Automaton:
+    """위기/부정 키워드를 공백 제거 형태로 등록한 Aho-Corasick 오토마톤 생성"""
+    automaton = ahocorasick.Automaton()
+    for category, keywords in (
+        ("crisis", CRISIS_KEYWORDS_NOSPACE),
+        ("negative", NEGATIVE_WORDS_NOSPACE),
+    ):
+        for keyword, keyword_no_space in keywords:
+            # 공백 제거 후 같은 키워드가 두 범주에 있으면 위기 범주를 우선
+            if keyword_no_space not in automaton:
+                automaton.add_word(keyword_no_space, (category, keyword))
+    automaton.make_automaton()
+    return automaton
+
+
+# 모듈 로드 시 한 번만 구성
+KEYWORD_AUTOMATON = _build_automaton()
+
+# 위기 감지 결과 캐시 (자해 관련 원문이 메모리에 남지 않도록 메시지 대신 해시를 키로 저장)
+DETECTION_CACHE_MAX_ENTRIES = 1024
+_detection_cache: "OrderedDict[bytes, Tuple[bool, str]]" = OrderedDict()  # 메시지 해시 -> 결과
+# 그래프의 동기 실행(스레드)과 비동기 실행이 함께 사용하므로 갱신은 락으로 보호
+_detection_cache_lock = threading.Lock()
 
 
 class CrisisDetector:
     """위기 신호 감지기"""
 
     @staticmethod
-    def detect_crisis(message: str) -> Tuple[bool, str]:
+    def detect_crisis(message: str, message_lower: str | None = None) -> Tuple[bool, str]:
         """위기 신호 감지
+
+        결과는 메시지에만 의존하므로 재전송/중복 메시지는 캐시된 결과를 반환합니다.
         
         Args:
             message: 사용자 메시지
+            message_lower: 이미 소문자로 변환된 메시지 (있으면 재변환하지 않음)
             
         Returns:
             (is_crisis, risk_level): 위기 여부와 위험 수준
         """
-        message_lower = message.lower()
-        # 공백 제거 버전도 생성 (공백 차이 무시)
+        key = hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
+        with _detection_cache_lock:
+            cached = _detection_cache.get(key)
+            if cached is not None:
+                _detection_cache.move_to_end(key)
+                return cached
+
+        result = CrisisDetector._scan(message, message_lower)
+
+        with _detection_cache_lock:
+            _detection_cache[key] = result
+            _detection_cache.move_to_end(key)
+            while len(_detection_cache) > DETECTION_CACHE_MAX_ENTRIES:
+                _detection_cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _scan(message: str, message_lower: str | None = None) -> Tuple[bool, str]:
+        """키워드 오토마톤으로 메시지를 한 번 스캔하여 위기 여부와 위험 수준 판정"""
+        if message_lower is None:
+            message_lower = message.lower()
+        # 공백 차이를 무시하기 위해 공백 제거 버전으로 한 번만 스캔
         message_no_space = message_lower.replace(" ", "")
 
-        # 긴급 키워드 확인
-        for keyword in CRISIS_KEYWORDS:
-            keyword_no_space = keyword.replace(" ", "")
-            # 공백 있는 버전, 없는 버전 둘 다 확인
-            if keyword in message_lower or keyword_no_space in message_no_space:
+        matched_negative = set()
+        for _, (category, keyword) in KEYWORD_AUTOMATON.iter(message_no_space):
+            # 긴급 키워드가 하나라도 있으면 즉시 반환
+            if category == "crisis":
                 return True, "critical"
+            matched_negative.add(keyword)
 
-        # 추가 감정 키워드 분석
-        negative_words = [
-            "힘들어",
-            "괴로워",
-            "괴로워요",
-            "무력해",
-            "무기력해",
-            "절망적",
-            "포기",
-            "의미없어",
-            "희망없어",
-            "망가져",
-            "버티기 힘들어",
-            "너무 힘들어",
-            "견디기 어려워",
-            "이대로는 안 될 것 같아",
-            "미치겠어",
-            "화풀이",
-            "자학",
-            "자책",
-            "죄책감",
-            "후회",
-            "나약해",
-            "나약하다",
-            "쓸모없어",
-            "쓸모없다",
-            "누가 될 자격이 없어",
-            "혼자야",
-            "혼자다",
-            "고독해",
-            "외로워",
-            "절벽",
-            "절망",
-            "끝났어",
-            "끝났다",
-            "최악이야",
-            "최악이다",
-        ]
-        
-        # 부정 감정 키워드도 공백 무시해서 비교
-        negative_count = 0
-        for word in negative_words:
-            word_no_space = word.replace(" ", "")
-            if word in message_lower or word_no_space in message_no_space:
-                negative_count += 1
+        negative_count = len(matched_negative)
 
         if negative_count >= 3:
             return True, "high"
@@ -121,25 +206,6 @@ class CrisisDetector:
         return False, "low"
 
     @staticmethod
-    def get_crisis_recommendations(risk_level: str) -> list[str]:
+    def get_crisis_recommendations(risk_level: str) -> tuple[str, ...]:
         """위험 수준에 따른 권장사항"""
-        base_recommendations = [
-            "정신건강위기상담전화: 1393 (24시간)",
-            "응급실: 119",
-            "신뢰하는 사람에게 연락하기",
-            "가까운 정신건강복지센터 방문",
-        ]
-
-        if risk_level == "critical":
-            return [
-                "즉시 응급실(119) 또는 정신건강위기상담전화(1393)에 연락하세요",
-                "혼자 있지 마세요 - 신뢰하는 사람에게 연락하세요",
-                "자살예방상담전화: 1588-9191",
-            ] + base_recommendations
-        elif risk_level == "high":
-            return [
-                "전문가 상담을 권장합니다",
-            ] + base_recommendations
-        else:
-            return base_recommendations
-
+        return RECOMMENDATIONS_BY_RISK_LEVEL.get(risk_level, BASE_RECOMMENDATIONS)
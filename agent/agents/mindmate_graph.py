@@ -2,36 +2,173 @@
 LangGraph를 사용한 MindMate 워크플로우 그래프
 """
 
-from typing import TypedDict, Annotated, List
-from langgraph.graph import StateGraph, END
+import asyncio
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import AsyncIterator, Annotated, List
+
+import ahocorasick
+from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 
 from .crisis_detector import CrisisDetector
 from .sentiment_analyzer import SentimentAnalyzer
-from .chatbot_agent import ChatbotAgent, convert_messages_to_langchain
-
-
-class MindMateState(TypedDict):
+from .chatbot_agent import ChatbotAgent, convert_messages_to_langchain, get_llm
+from .semantic_cache import DEFAULT_CACHE_DIR, SemanticCache, context_key
+from .prompts import (
+    CRISIS_PROMPT_TEMPLATE,
+    CRISIS_SYSTEM_PROMPT,
+    MUSIC_PROMPT_TEMPLATE,
+    MUSIC_SYSTEM_PROMPT,
+)
+
+logger = logging.getLogger(f"mindmate.{__name__}")
+
+
+# 위험 수준별 위기 안내 메시지
+CRISIS_MESSAGES = {
+    "critical": (
+        "⚠️ **긴급 안내**\n\n"
+        "현재 상태를 매우 우려하고 있습니다. 즉시 전문가의 도움이 필요합니다.\n\n"
+        "- 정신건강위기상담전화: 1393 (24시간)\n"
+        "- 응급실: 119\n"
+        "- 자살예방상담전화: 1588-9191\n\n"
+        "혼자 있지 마시고 신뢰하는 사람에게 연락하세요."
+    ),
+    "high": (
+        "⚠️ **중요 안내**\n\n"
+        "현재 상태를 우려하고 있습니다. 전문가의 도움이 필요할 수 있습니다.\n\n"
+        "- 정신건강위기상담전화: 1393 (24시간)\n"
+        "- 응급실: 119"
+    ),
+}
+
+# 위기 응답 프롬프트와 위기 안내 메시지를 사용하는 위험 수준
+HIGH_RISK_LEVELS = frozenset({"critical", "high"})
+
+# LLM 호출 없이 바로 응답하는 인사말
+GREETINGS = frozenset({"안녕", "안녕하세요", "하이", "ㅎㅇ", "hi", "hello"})
+
+# 빈 메시지/인사말에 대한 기본 응답
+TRIVIAL_MESSAGE_RESPONSE = "편하게 이야기해줄래?"
+GREETING_RESPONSE = "안녕, 반가워. 요즘 어떻게 지내? 편하게 이야기해줄래?"
+
+# 위기 응답/노래 추천 시스템 메시지 (모든 요청이 공유)
+CRISIS_SYSTEM_MESSAGE = SystemMessage(content=CRISIS_SYSTEM_PROMPT)
+MUSIC_SYSTEM_MESSAGE = SystemMessage(content=MUSIC_SYSTEM_PROMPT)
+
+# 위기 응답 프롬프트에 포함할 최근 대화 이력 수
+CRISIS_HISTORY_MESSAGES = 4
+
+# 노래 추천용 감정 상태 구간 (점수가 MOOD_THRESHOLDS[i] 미만이면 MOOD_DESCRIPTIONS[i])
+MOOD_THRESHOLDS = (-0.5, -0.2, 0.2)
+MOOD_DESCRIPTIONS = (
+    "very depressed and sad",
+    "depressed and struggling",
+    "calm",
+    "positive and happy",
+)
+UNKNOWN_MOOD_DESCRIPTION = "current emotional state"
+
+# 위기 응답/노래 추천 캐시 설정
+RESPONSE_CACHE_DIR = DEFAULT_CACHE_DIR / "graph"
+RESPONSE_CACHE_MAX_ENTRIES = 2000
+
+# 노래 추천 요청 키워드
+MUSIC_KEYWORDS = ("노래", "음악", "추천", "들려줘", "들어볼래", "추천해줘")
+
+# 노래 추천을 유도하는 부정 감정 키워드
+# 부분 문자열로 매칭하므로 활용형("힘들어요", "외로웠어" 등)은 어근 하나로 모두 포함됨
+NEGATIVE_KEYWORDS = (
+    "우울", "슬프", "슬퍼", "슬픔", "눈물",
+    "울고싶", "울고 싶", "울어", "울었",
+    "힘들", "지치", "지쳐", "지쳤", "지친", "피곤",
+    "외로", "외롭", "아프", "아파", "아픈",
+    "괴로", "괴롭", "답답", "불안", "걱정", "무기력",
+    "의미없", "의미 없", "소용없", "소용 없",
+    "미안", "죄송", "후회", "실망", "절망", "상처",
+    "서러", "쓸쓸", "허탈", "공허",
+)
+
+
+def _build_music_trigger_automaton() -> ahocorasick.Automaton:
+    """노래 추천/부정 감정 키워드를 등록한 Aho-Corasick 오토마톤 생성"""
+    automaton = ahocorasick.Automaton()
+    for category, keywords in (
+        ("music", MUSIC_KEYWORDS),
+        ("negative", NEGATIVE_KEYWORDS),
+    ):
+        for keyword in keywords:
+            if keyword not in automaton:
+                automaton.add_word(keyword, (category, keyword))
+    automaton.make_automaton()
+    return automaton
+
+
+# 모듈 로드 시 한 번만 구성
+MUSIC_TRIGGER_AUTOMATON = _build_music_trigger_automaton()
+
+# 워밍업 시 그래프 전체를 실행하는 메시지 (인사말/빈 메시지처럼 그래프를 건너뛰지 않는 일반 문장)
+WARMUP_MESSAGE = "오늘 하루 있었던 일을 이야기해볼게"
+
+
+class _WarmupChatbot:
+    """워밍업용 챗봇 (LLM을 호출하거나 캐시에 저장하지 않고 빈 응답 반환)"""
+
+    def get_response(self, user_message: str, conversation_history: list | None = None) -> str:
+        return ""
+
+    async def aget_response(self, user_message: str, conversation_history: list | None = None) -> str:
+        return ""
+
+    async def astream_response(
+        self, user_message: str, conversation_history: list | None = None
+    ) -> AsyncIterator[str]:
+        yield ""
+
+
+@dataclass(slots=True)
+class MindMateState:
     """MindMate 상태 정의"""
-    messages: Annotated[list[BaseMessage], add_messages]
-    user_message: str
-    user_id: str | None
-    conversation_history: list[dict] | None
-    ai_response: str | None
-    sentiment_score: float | None
-    risk_level: str | None
-    is_crisis: bool
-    crisis_detected: bool
+    messages: Annotated[list[BaseMessage], add_messages] = field(default_factory=list)
+    user_message: str = ""
+    user_message_lower: str | None = None
+    user_id: str | None = None
+    # role/content 키를 가진 dict 또는 role/content 속성을 가진 객체(ChatMessage 등)의 목록
+    conversation_history: list | None = None
+    ai_response: str | None = None
+    sentiment_score: float | None = None
+    risk_level: str | None = None
+    is_crisis: bool = False
+    crisis_detected: bool = False
 
 
 class MindMateGraph:
     """MindMate 워크플로우 그래프"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        response_cache: SemanticCache | None = None,
+        chatbot: ChatbotAgent | None = None,
+        crisis_llm: BaseChatModel | None = None,
+        music_llm: BaseChatModel | None = None,
+    ):
         self.crisis_detector = CrisisDetector()
         self.sentiment_analyzer = SentimentAnalyzer()
-        self.chatbot = ChatbotAgent()
+        self.chatbot = chatbot or ChatbotAgent()
+        # 위기 응답/노래 추천용 LLM (연결 풀을 공유하는 클라이언트 재사용)
+        self.crisis_llm = crisis_llm or get_llm("gpt-4o-mini", 0.8)
+        self.music_llm = music_llm or get_llm("gpt-4o-mini", 0.7)
+        # 위기 응답/노래 추천은 프롬프트 형식이 고정되어 있어 유사한 메시지끼리 응답을 재사용
+        self.response_cache = response_cache or SemanticCache(
+            cache_dir=RESPONSE_CACHE_DIR, max_entries=RESPONSE_CACHE_MAX_ENTRIES
+        )
 
         # 그래프 구성
         self.graph = self._build_graph()
@@ -41,6 +178,32 @@ class MindMateGraph:
         """LangGraph CLI를 위한 컴파일된 그래프"""
         return self.graph
 
+    async def awarmup(self) -> None:
+        """첫 요청 지연을 줄이기 위해 그래프 실행 경로와 지연 초기화되는 구성 요소를 미리 실행
+
+        이 인스턴스의 구성 요소는 동시 요청이 사용하므로 바꾸지 않고, LLM 대신 호출 비용이 없는 대체 객체와
+        디스크에 저장하지 않는 캐시를 주입한 별도 그래프로 동기/비동기/스트리밍 경로를 한 번씩 실행합니다.
+        """
+        warmup_llm = FakeListChatModel(responses=[""])
+        warmup_graph = MindMateGraph(
+            response_cache=SemanticCache(cache_dir=None),
+            chatbot=_WarmupChatbot(),
+            crisis_llm=warmup_llm,
+            music_llm=warmup_llm,
+        )
+        await asyncio.to_thread(warmup_graph.process, WARMUP_MESSAGE)
+        await warmup_graph.aprocess(WARMUP_MESSAGE)
+        async for _ in warmup_graph.astream_process(WARMUP_MESSAGE):
+            pass
+        # 시맨틱 캐시 임베딩 모델 로드 (모델은 프로세스 내 모든 캐시가 공유)
+        if self.response_cache.enabled:
+            await asyncio.to_thread(self.response_cache.embed, "warmup")
+
+    def flush_caches(self) -> None:
+        """시맨틱 캐시에서 아직 디스크에 저장되지 않은 항목 저장 (서버 종료 시 호출)"""
+        self.chatbot.semantic_cache.flush()
+        self.response_cache.flush()
+
     def _build_graph(self) -> StateGraph:
         """워크플로우 그래프 구성"""
         workflow = StateGraph(MindMateState)
@@ -48,13 +211,17 @@ class MindMateGraph:
         # 노드 추가#
         workflow.add_node("detect_crisis", self._detect_crisis_node)
         workflow.add_node("analyze_sentiment", self._analyze_sentiment_node)
-        workflow.add_node("generate_response", self._generate_response_node)
+        # invoke/ainvoke 모두 지원 (비동기 실행 시에는 LLM 호출을 await)
+        workflow.add_node(
+            "generate_response",
+            RunnableLambda(self._generate_response_node, afunc=self._agenerate_response_node),
+        )
         workflow.add_node("handle_crisis", self._handle_crisis_node)
 
-        # 엣지 설정
-        workflow.set_entry_point("detect_crisis")
-        workflow.add_edge("detect_crisis", "analyze_sentiment")
-        workflow.add_edge("analyze_sentiment", "generate_response")
+        # 엣지 설정: 위기 감지와 감정 분석은 서로 독립적이므로 병렬 실행 후 합류
+        workflow.add_edge(START, "detect_crisis")
+        workflow.add_edge(START, "analyze_sentiment")
+        workflow.add_edge(["detect_crisis", "analyze_sentiment"], "generate_response")
         workflow.add_conditional_edges(
             "generate_response",
             self._should_handle_crisis,
@@ -67,329 +234,316 @@ class MindMateGraph:
 
         return workflow.compile()
 
-    def _detect_crisis_node(self, state: MindMateState) -> MindMateState:
-        """위기 감지 노드"""
-        message = state["user_message"]
-        is_crisis, risk_level = self.crisis_detector.detect_crisis(message)
+    def _detect_crisis_node(self, state: MindMateState) -> dict:
+        """위기 감지 노드
 
-        state["is_crisis"] = is_crisis
-        state["risk_level"] = risk_level
-        state["crisis_detected"] = is_crisis
+        감정 분석 노드와 같은 단계에서 병렬 실행되므로 변경된 필드만 반환합니다.
+        """
+        message = state.user_message
+        is_crisis, risk_level = self.crisis_detector.detect_crisis(
+            message, state.user_message_lower
+        )
 
-        return state
+        return {
+            "is_crisis": is_crisis,
+            "risk_level": risk_level,
+            "crisis_detected": is_crisis,
+        }
 
-    def _analyze_sentiment_node(self, state: MindMateState) -> MindMateState:
+    def _analyze_sentiment_node(self, state: MindMateState) -> dict:
         """감정 분석 노드"""
-        message = state["user_message"]
+        message = state.user_message
         sentiment_score, _ = self.sentiment_analyzer.analyze(message)
 
-        state["sentiment_score"] = sentiment_score
+        return {"sentiment_score": sentiment_score}
+
+    @staticmethod
+    def _should_recommend_music(user_message: str, sentiment_score: float | None) -> bool:
+        """감정이 부정적이거나 사용자가 노래 추천을 요청한 경우 노래 추천 여부 결정"""
+        # 1. 명시적 노래 추천 요청 / 감정 키워드 감지 (한 번의 스캔으로 첫 매칭에서 종료)
+        for _ in MUSIC_TRIGGER_AUTOMATON.iter(user_message):
+            return True
 
-        return state
+        # 2. 부정적 감정 감지 시 자동 추천
+        return sentiment_score is not None and sentiment_score < -0.3
 
-    def _generate_response_node(self, state: MindMateState) -> MindMateState:
+    def _generate_response_node(self, state: MindMateState) -> dict:
         """응답 생성 노드"""
-        user_message = state["user_message"]
-        conversation_history = state.get("conversation_history")
-        sentiment_score = state.get("sentiment_score")
-        is_crisis = state.get("is_crisis", False)
-        risk_level = state.get("risk_level", "low")
+        user_message = state.user_message
+        conversation_history = state.conversation_history
+        sentiment_score = state.sentiment_score
+        is_crisis = state.is_crisis
+        risk_level = state.risk_level or "low"
 
         # 챗봇 응답 생성
         try:
-            # 대화 이력을 LangChain 형식으로 변환
-            langchain_messages = None
-            if conversation_history:
-                langchain_messages = convert_messages_to_langchain(conversation_history)
-            
-            # 위기 상황일 때는 특별한 프롬프트 추가
-            if is_crisis and risk_level in ["critical", "high"]:
-                ai_response = self._generate_crisis_response(user_message, langchain_messages)
-            else:
-                ai_response = self.chatbot.get_response(user_message, langchain_messages)
+            # 위기 상황일 때는 특별한 프롬프트로 응답하고 노래 추천은 하지 않음
+            if is_crisis and risk_level in HIGH_RISK_LEVELS:
+                ai_response = self._generate_crisis_response(user_message, risk_level, conversation_history)
+                return {"ai_response": ai_response}
+
+            ai_response = self.chatbot.get_response(user_message, conversation_history)
             
             # 감정이 부정적이거나 사용자가 노래 추천을 요청한 경우 자동으로 노래 추천 추가
-            should_recommend_music = False
-            music_recommendation = ""
-            
-            # 1. 명시적 노래 추천 요청 감지
-            music_keywords = ["노래", "음악", "추천", "들려줘", "들어볼래", "추천해줘"]
-            if any(keyword in user_message for keyword in music_keywords):
-                should_recommend_music = True
-            
-            # 2. 부정적 감정 감지 시 자동 추천
-            elif sentiment_score is not None and sentiment_score < -0.3:
-                should_recommend_music = True
-            
-            # 3. 감정 키워드 감지
-            negative_keywords = [
-                "우울", "슬퍼", "힘들어", "지쳐", "피곤", "외로워", "외롭", "슬픔", "눈물",
-                "울고싶", "울고 싶", "울고싶어", "울고 싶어", "울고싶다", "울고 싶다",
-                "울어", "울었어", "울었", "울었어요", "울었습니다",
-                "슬프", "슬프다", "슬퍼요", "슬퍼서", "슬프네", "슬프네요",
-                "힘들", "힘들다", "힘들어요", "힘들어서", "힘들었어", "힘들었어요",
-                "지쳤", "지쳤어", "지쳤어요", "지쳤습니다", "지치", "지친",
-                "피곤해", "피곤해요", "피곤하다", "피곤해서", "피곤했어",
-                "외로", "외롭다", "외로워요", "외로워서", "외로웠어", "외로웠어요",
-                "눈물", "눈물나", "눈물나요", "눈물나네", "눈물났어", "눈물났어요",
-                "아픈", "아프", "아파", "아파요", "아프다", "아파서",
-                "괴로", "괴롭", "괴로워", "괴로워요", "괴로워서", "괴로웠어",
-                "답답", "답답해", "답답해요", "답답하다", "답답해서",
-                "불안", "불안해", "불안해요", "불안하다", "불안해서",
-                "걱정", "걱정돼", "걱정돼요", "걱정돼서", "걱정이",
-                "무기력", "무기력해", "무기력해요", "무기력하다",
-                "의미없", "의미 없", "의미없어", "의미 없어", "의미없다",
-                "소용없", "소용 없", "소용없어", "소용 없어",
-                "미안", "미안해", "미안해요", "미안해서", "죄송",
-                "후회", "후회돼", "후회돼요", "후회돼서", "후회해",
-                "실망", "실망해", "실망해요", "실망해서", "실망했어",
-                "절망", "절망적", "절망해", "절망해요",
-                "상처", "상처받", "상처받았", "상처받았어", "상처받았어요",
-                "서러", "서러워", "서러워요", "서러워서",
-                "쓸쓸", "쓸쓸해", "쓸쓸해요", "쓸쓸해서",
-                "허탈", "허탈해", "허탈해요", "허탈해서",
-                "공허", "공허해", "공허해요", "공허해서",
-            ]
-            if any(keyword in user_message for keyword in negative_keywords):
-                should_recommend_music = True
-            
-            if should_recommend_music:
+            if self._should_recommend_music(user_message, sentiment_score):
                 try:
                     # 간단한 노래 추천 생성
                     music_recommendation = self._generate_music_recommendation(user_message, sentiment_score)
                     if music_recommendation:
                         ai_response += f"\n\n{music_recommendation}"
                 except Exception as e:
-                    print(f"⚠️ 노래 추천 생성 오류: {str(e)}")
+                    logger.warning(f"⚠️ 노래 추천 생성 오류: {str(e)}")
                     # 오류가 발생해도 기본 응답은 유지
             
         except Exception as e:
             ai_response = f"죄송합니다. 오류가 발생했습니다: {str(e)}"
 
-        state["ai_response"] = ai_response
+        return {"ai_response": ai_response}
 
-        return state
-    
-    def _generate_crisis_response(self, user_message: str, conversation_history: List[BaseMessage] = None) -> str:
+    async def _agenerate_response_node(self, state: MindMateState) -> dict:
+        """응답 생성 노드 (비동기)
+
+        챗봇 응답과 노래 추천은 서로 독립적인 LLM 호출이므로 동시에 실행합니다.
+        """
+        user_message = state.user_message
+        conversation_history = state.conversation_history
+        sentiment_score = state.sentiment_score
+        is_crisis = state.is_crisis
+        risk_level = state.risk_level or "low"
+
+        try:
+            if is_crisis and risk_level in HIGH_RISK_LEVELS:
+                ai_response = await self._agenerate_crisis_response(user_message, risk_level, conversation_history)
+                return {"ai_response": ai_response}
+
+            response_task = self.chatbot.aget_response(user_message, conversation_history)
+
+            if self._should_recommend_music(user_message, sentiment_score):
+                # 노래 추천 오류는 내부에서 처리되어 빈 문자열로 반환됨
+                ai_response, music_recommendation = await asyncio.gather(
+                    response_task,
+                    self._agenerate_music_recommendation(user_message, sentiment_score),
+                )
+                if music_recommendation:
+                    ai_response += f"\n\n{music_recommendation}"
+            else:
+                ai_response = await response_task
+
+        except Exception as e:
+            ai_response = f"죄송합니다. 오류가 발생했습니다: {str(e)}"
+
+        return {"ai_response": ai_response}
+
+    def _lookup_response_cache(self, user_message: str, context: str) -> tuple[str | None, object]:
+        """위기 응답/노래 추천 캐시 조회
+
+        Returns:
+            (cached_response, embedding): 캐시된 응답(없으면 None)과 저장용 임베딩
+        """
+        if not self.response_cache.enabled:
+            return None, None
+
+        cache_embedding = self.response_cache.embed(user_message)
+        return self.response_cache.lookup(cache_embedding, context), cache_embedding
+
+    def _add_response_cache(self, embedding, user_message: str, response: str, context: str):
+        """새로 생성한 위기 응답/노래 추천을 캐시에 저장"""
+        if embedding is not None and response:
+            self.response_cache.add(embedding, user_message, response, context)
+
+    async def _alookup_response_cache(self, user_message: str, context: str) -> tuple[str | None, object]:
+        """위기 응답/노래 추천 캐시 조회 (임베딩 계산과 인덱스 검색은 스레드에서 실행)"""
+        if not self.response_cache.enabled:
+            return None, None
+        return await asyncio.to_thread(self._lookup_response_cache, user_message, context)
+
+    async def _aadd_response_cache(self, embedding, user_message: str, response: str, context: str):
+        """새로 생성한 위기 응답/노래 추천을 캐시에 저장 (스레드에서 실행)"""
+        if embedding is not None and response:
+            await asyncio.to_thread(self.response_cache.add, embedding, user_message, response, context)
+
+    @staticmethod
+    def _crisis_cache_context(risk_level: str, crisis_history: List[BaseMessage]) -> str:
+        """위기 응답 캐시 문맥 키
+
+        위기 응답은 대화 이력과 함께 생성되므로 위험 수준과 프롬프트에 포함되는 대화 이력이 모두 같을 때만 재사용합니다.
+        """
+        return f"crisis:{risk_level}:{context_key(crisis_history)}"
+
+    @staticmethod
+    def _crisis_history(conversation_history: list | None) -> List[BaseMessage]:
+        """위기 응답 프롬프트에 포함할 최근 대화 이력 (너무 길어지지 않도록, 필요한 부분만 변환)"""
+        return convert_messages_to_langchain(conversation_history, limit=CRISIS_HISTORY_MESSAGES)
+
+    def _build_crisis_messages(
+        self, user_message: str, crisis_history: List[BaseMessage]
+    ) -> List[BaseMessage]:
+        """위기 상황 응답용 메시지 목록 구성"""
+        crisis_prompt = CRISIS_PROMPT_TEMPLATE.format(user_message=user_message)
+        return [CRISIS_SYSTEM_MESSAGE, *crisis_history, HumanMessage(content=crisis_prompt)]
+
+    def _generate_crisis_response(
+        self, user_message: str, risk_level: str, conversation_history: list | None = None
+    ) -> str:
         """위기 상황에서의 특별한 응답 생성"""
         try:
-            from langchain_openai import ChatOpenAI
-            from langchain_core.messages import HumanMessage, SystemMessage
-            
-            llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.8)
-            
-            crisis_prompt = f"""The user said: "{user_message}". This user is in a very difficult situation right now and may be thinking about suicide.
-
-Deliver a warm and hopeful message similar to the following lyrics:
-
-"죽지 마 (Don't die)
-동굴 속에 숨지 마 (Don't hide in a cave)
-기죽지 마 (Don't lose heart)
-완벽하게 안 살아도 돼 (You don't have to live perfectly)
-거울 앞에서 그렇게 울지 마 (Don't cry like that in front of the mirror)
-흔들리는 것들이 예뻐 (Things that sway are beautiful)
-그러니까 흔들리면 흔들리게 둬 (So if they sway, let them sway)
-아니, 춤을 춘다 생각해 (No, think of it as dancing)
-외로운 발자국 하나 하나 (Each lonely footprint)
-지구에 키스마크를 남긴다고 생각해 (Think of it as leaving kiss marks on Earth)
-눈앞이 캄캄해져서 아무것도 안 보일 땐 (When everything goes dark and you can't see)
-넌 그냥 멋진 선글라스를 낀 거야 (You're just wearing cool sunglasses)
-무지개는 굽어야 무지개고 (Rainbows need to be curved to be rainbows)
-늘 비가 온 뒤 떠 (They always appear after rain)
-좀 지친 거야 (You're just tired)
-알아 (I know)
-행복이란 게 마치 숨바꼭질 같았겠지 (Happiness must have been like hide and seek)
-골목 모퉁이 (Around the corner)
-방구석 책장 뒤 (Behind the bookshelf in the corner)
-침대 밑 (Under the bed)
-아무리 뒤져도 보이지 않았겠지 (No matter how much you searched, you couldn't find it)
-영원히 술래라고 느꼈겠지 (You must have felt like you were always 'it')
-내일이 왔을 때 (When tomorrow comes)
-네가 아직도 여기 있을 거란 걸 (That you'll still be here)
-못 믿겠다면 (If you can't believe it)
-네가 널 못 믿겠으면 (If you can't believe in yourself)
-내가 너를 믿어줄게 (I'll believe in you)
-아무리 사소하더라도 계속 살아야 될 이유를 (Reasons to keep living, no matter how small)
-내가 한번 말해볼게 (Let me tell you)
-죽지 마 (Don't die)
-뻔한 말이라도 들어, 야 들어 (Even if it's a cliché, listen, hey listen)
-아무것도 아냐 (It's nothing)
-지나가면 진짜 아무것도 아냐 (When it passes, it's really nothing)
-여기 있는 사람들 백 년 뒤면 다 사라져 (Everyone here will be gone in a hundred years)
-그러니까 (So)
-한 시간만 더 살아보자 (Let's live one more hour)
-건조기 돌리면 한 시간 금방 가 (If you run the dryer, an hour goes by quickly)
-한 시간이 지나면 건조기에서 갓 나온 빨래 냄새 (After an hour, the smell of freshly dried laundry)
-그거 맡으면서 힘내자 (Let's stay strong while smelling that)
-그렇게 하루 더 살자 (Let's live one more day like that)
-하루 더 살면 (If we live one more day)
-쿠팡에서 제일 비싼 샴푸 린스 산 다음에 (After buying the most expensive shampoo and rinse from Coupang)
-그 두 개를 동시에 다 써버릴 때까지 (Until we use up both of them at the same time)
-집에 오는 길 현관 바로 앞에서 (Right in front of the entrance on the way home)
-듣고 있던 노래가 영화처럼 딱 끝날 때까지 (Until the song we were listening to ends perfectly like in a movie)
-그런 하찮은 행운이 너한테도 한 번쯤 올 때까지 (Until such trivial luck comes to you at least once)
-한 달만 더 살아보자 (Let's live one more month)
-그렇게 하루를 더 살고 한 달 더 살면 (If we live one more day and one more month like that)
-올해도 금방이야 (This year will pass quickly too)
-그렇게 우리 (Like that, us)
-오늘 보고 내일 보고 (See each other today and tomorrow)
-모레 또 봐 (And the day after)
-매일 매일 오래 봐 (See each other every day for a long time)
-오늘은 죽지 마 (Don't die today)"
-
-Referencing the tone and message of these lyrics, deliver a warm and sincere message of comfort to the user.
-
-Requirements:
-- Include direct and warm messages like "죽지 마" (don't die), "오늘은 죽지 마" (don't die today)
-- Let them know it's okay not to live perfectly
-- Tell them that things that sway are beautiful, and if they sway, let them sway
-- Help them find meaning in small things (the smell of freshly dried laundry, favorite songs, shampoo scent - small everyday things)
-- Present concrete and achievable goals like "한 시간만 더 살아보자" (let's live one more hour), "하루만 더 살아보자" (let's live one more day)
-- Deliver the message that "지나가면 진짜 아무것도 아냐" (when it passes, it's really nothing), but warmly, not preachy
-- Deliver the message "내가 너를 믿어줄게" (I'll believe in you)
-- Comfort them that even when everything seems dark, it's just like wearing cool sunglasses
-- Naturally mention that rainbows need to be curved to be rainbows, and they always appear after rain
-- Tell them to wait for small fortunes to come
-- Deliver even clichéd words warmly and sincerely, as if asking them to listen
-- Absolutely avoid mechanical or stiff speech
-- Absolutely avoid exclamations like "와", "와!"
-- Use polite but warm and natural language, like a close friend you've known for a long time
-- Keep it concise and to the point (about 3-5 paragraphs)
-- Make sure genuine warmth is felt
-
-IMPORTANT: Always respond in Korean. Use natural, warm Korean language throughout your response."""
-
-            messages = [SystemMessage(content="You are a warm and empathetic counseling friend who genuinely understands and empathizes with users. Your most important mission is to deliver hope and comfort to users in crisis situations. Always respond in Korean with natural, warm language.")]
-            
-            if conversation_history:
-                # 최근 대화 이력 일부만 포함 (너무 길어지지 않도록)
-                recent_history = conversation_history[-4:] if len(conversation_history) > 4 else conversation_history
-                messages.extend(recent_history)
-            
-            messages.append(HumanMessage(content=crisis_prompt))
-            
-            response = llm.invoke(messages)
+            crisis_history = self._crisis_history(conversation_history)
+            cache_context = self._crisis_cache_context(risk_level, crisis_history)
+            cached_response, cache_embedding = self._lookup_response_cache(user_message, cache_context)
+            if cached_response is not None:
+                return cached_response
+
+            response = self.crisis_llm.invoke(self._build_crisis_messages(user_message, crisis_history))
+            self._add_response_cache(cache_embedding, user_message, response.content, cache_context)
             return response.content
         except Exception as e:
-            print(f"❌ 위기 상황 응답 생성 오류: {str(e)}")
+            logger.exception(f"❌ 위기 상황 응답 생성 오류: {str(e)}")
             # 폴백: 기본 챗봇 응답 사용
             return self.chatbot.get_response(user_message, conversation_history)
+
+    async def _agenerate_crisis_response(
+        self, user_message: str, risk_level: str, conversation_history: list | None = None
+    ) -> str:
+        """위기 상황에서의 특별한 응답 생성 (비동기)"""
+        try:
+            crisis_history = self._crisis_history(conversation_history)
+            cache_context = self._crisis_cache_context(risk_level, crisis_history)
+            cached_response, cache_embedding = await self._alookup_response_cache(user_message, cache_context)
+            if cached_response is not None:
+                return cached_response
+
+            response = await self.crisis_llm.ainvoke(self._build_crisis_messages(user_message, crisis_history))
+            await self._aadd_response_cache(cache_embedding, user_message, response.content, cache_context)
+            return response.content
+        except Exception as e:
+            logger.exception(f"❌ 위기 상황 응답 생성 오류: {str(e)}")
+            # 폴백: 기본 챗봇 응답 사용
+            return await self.chatbot.aget_response(user_message, conversation_history)
+
+    async def _astream_crisis_response(
+        self, user_message: str, risk_level: str, conversation_history: list | None = None
+    ) -> AsyncIterator[str]:
+        """위기 상황에서의 특별한 응답을 토큰 단위로 생성"""
+        chunks = []
+        try:
+            crisis_history = self._crisis_history(conversation_history)
+            cache_context = self._crisis_cache_context(risk_level, crisis_history)
+            cached_response, cache_embedding = await self._alookup_response_cache(user_message, cache_context)
+            if cached_response is not None:
+                yield cached_response
+                return
+
+            async for chunk in self.crisis_llm.astream(
+                self._build_crisis_messages(user_message, crisis_history)
+            ):
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+
+            await self._aadd_response_cache(cache_embedding, user_message, "".join(chunks), cache_context)
+        except Exception as e:
+            # 이미 일부를 전달했다면 응답을 이어 붙일 수 없으므로 오류를 그대로 전달
+            if chunks:
+                raise
+            logger.exception(f"❌ 위기 상황 응답 생성 오류: {str(e)}")
+            # 폴백: 기본 챗봇 응답 사용
+            async for chunk in self.chatbot.astream_response(user_message, conversation_history):
+                yield chunk
     
+    @staticmethod
+    def _mood_description(sentiment_score: float | None) -> str:
+        """감정 점수로부터 노래 추천 프롬프트용 감정 상태 설명 결정"""
+        if sentiment_score is None:
+            return UNKNOWN_MOOD_DESCRIPTION
+        return MOOD_DESCRIPTIONS[bisect_right(MOOD_THRESHOLDS, sentiment_score)]
+
+    def _build_music_messages(self, user_message: str, mood_desc: str) -> List[BaseMessage]:
+        """노래 추천용 메시지 목록 구성"""
+        prompt = MUSIC_PROMPT_TEMPLATE.format(user_message=user_message, mood_desc=mood_desc)
+
+        return [
+            MUSIC_SYSTEM_MESSAGE,
+            HumanMessage(content=prompt),
+        ]
+
     def _generate_music_recommendation(self, user_message: str, sentiment_score: float = None) -> str:
         """간단한 노래 추천 생성"""
         try:
-            from langchain_openai import ChatOpenAI
-            from langchain_core.messages import HumanMessage, SystemMessage
-            
-            llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-            
-            # 감정 상태 판단
-            if sentiment_score is not None:
-                if sentiment_score < -0.5:
-                    mood_desc = "very depressed and sad"
-                elif sentiment_score < -0.2:
-                    mood_desc = "depressed and struggling"
-                elif sentiment_score < 0.2:
-                    mood_desc = "calm"
-                else:
-                    mood_desc = "positive and happy"
-            else:
-                mood_desc = "current emotional state"
+            # 감정 상태별로 캐시를 구분하여 우울/행복 추천이 섞이지 않도록 함
+            mood_desc = self._mood_description(sentiment_score)
+            cache_context = f"music:{mood_desc}"
+            cached_response, cache_embedding = self._lookup_response_cache(user_message, cache_context)
+            if cached_response is not None:
+                return cached_response
+
+            response = self.music_llm.invoke(self._build_music_messages(user_message, mood_desc))
+            self._add_response_cache(cache_embedding, user_message, response.content, cache_context)
             
-            prompt = f"""The user said: "{user_message}". Their current emotional state is {mood_desc}.
-
-Recommend 1-2 songs available on YouTube that match this emotion.
-
-Requirements:
-- Clearly provide the artist name and song title
-- Explain the recommendation reason in one sentence
-- Include a YouTube search link (format: https://www.youtube.com/results?search_query=artistname+songtitle)
-- Use natural and warm tone, like a friend recommending
-
-Response format:
-🎵 이런 기분일 때 들으면 좋을 노래를 추천해줄게. (I'll recommend a song that's good to listen to when you feel like this.)
+            return response.content
+        except Exception as e:
+            logger.exception(f"❌ 노래 추천 생성 오류: {str(e)}")
+            return ""
 
-[Artist Name - Song Title]
-추천 이유: ... (Recommendation reason: ...)
-유튜브: https://www.youtube.com/results?search_query=...
+    async def _agenerate_music_recommendation(self, user_message: str, sentiment_score: float = None) -> str:
+        """간단한 노래 추천 생성 (비동기)"""
+        try:
+            mood_desc = self._mood_description(sentiment_score)
+            cache_context = f"music:{mood_desc}"
+            cached_response, cache_embedding = await self._alookup_response_cache(user_message, cache_context)
+            if cached_response is not None:
+                return cached_response
 
-IMPORTANT: Always respond in Korean. Use natural, warm Korean language."""
+            response = await self.music_llm.ainvoke(self._build_music_messages(user_message, mood_desc))
+            await self._aadd_response_cache(cache_embedding, user_message, response.content, cache_context)
 
-            response = llm.invoke([
-                SystemMessage(content="You are a music recommendation expert. Recommend songs that match the user's emotions warmly. Always respond in Korean."),
-                HumanMessage(content=prompt),
-            ])
-            
             return response.content
         except Exception as e:
-            print(f"❌ 노래 추천 생성 오류: {str(e)}")
+            logger.exception(f"❌ 노래 추천 생성 오류: {str(e)}")
             return ""
 
-    def _handle_crisis_node(self, state: MindMateState) -> MindMateState:
+    def _handle_crisis_node(self, state: MindMateState) -> dict:
         """위기 처리 노드"""
-        risk_level = state["risk_level"]
-        ai_response = state.get("ai_response", "")
+        risk_level = state.risk_level
+        ai_response = state.ai_response or ""
 
         # 위기 상황 메시지 추가
         crisis_message = self._get_crisis_message(risk_level)
         updated_response = f"{ai_response}\n\n{crisis_message}"
 
-        state["ai_response"] = updated_response
+        update = {"ai_response": updated_response}
 
-        # 위기 알림 메시지도 추가
-        if state["messages"]:
-            state["messages"][-1] = AIMessage(content=updated_response)
+        # 위기 알림 메시지도 추가 (같은 id로 마지막 메시지를 교체)
+        if state.messages:
+            update["messages"] = [AIMessage(content=updated_response, id=state.messages[-1].id)]
 
-        return state
+        return update
 
     def _should_handle_crisis(self, state: MindMateState) -> str:
         """위기 처리 여부 결정"""
-        risk_level = state.get("risk_level", "low")
-        if risk_level in ["high", "critical"]:
+        risk_level = state.risk_level or "low"
+        if risk_level in HIGH_RISK_LEVELS:
             return "crisis"
         return "continue"
 
     def _get_crisis_message(self, risk_level: str) -> str:
         """위기 상황 메시지 생성"""
-        recommendations = self.crisis_detector.get_crisis_recommendations(risk_level)
-
-        if risk_level == "critical":
-            return (
-                "⚠️ **긴급 안내**\n\n"
-                "현재 상태를 매우 우려하고 있습니다. 즉시 전문가의 도움이 필요합니다.\n\n"
-                f"- 정신건강위기상담전화: 1393 (24시간)\n"
-                f"- 응급실: 119\n"
-                f"- 자살예방상담전화: 1588-9191\n\n"
-                "혼자 있지 마시고 신뢰하는 사람에게 연락하세요."
-            )
-        elif risk_level == "high":
-            return (
-                "⚠️ **중요 안내**\n\n"
-                "현재 상태를 우려하고 있습니다. 전문가의 도움이 필요할 수 있습니다.\n\n"
-                f"- 정신건강위기상담전화: 1393 (24시간)\n"
-                f"- 응급실: 119"
-            )
-        else:
-            return ""
-
-    def process(self, user_message: str, user_id: str | None = None, 
-                conversation_history: list[dict] | None = None) -> dict:
-        """워크플로우 실행"""
-        initial_state: MindMateState = {
-            "messages": [],
-            "user_message": user_message,
-            "user_id": user_id,
-            "conversation_history": conversation_history,
-            "ai_response": None,
-            "sentiment_score": None,
-            "risk_level": None,
-            "is_crisis": False,
-            "crisis_detected": False,
-        }
-
-        # 그래프 실행
-        final_state = self.graph.invoke(initial_state)
+        return CRISIS_MESSAGES.get(risk_level, "")
+
+    @staticmethod
+    def _initial_state(user_message: str, user_id: str | None,
+                       conversation_history: list | None) -> MindMateState:
+        """그래프 초기 상태 생성"""
+        return MindMateState(
+            user_message=user_message,
+            # 위기 감지 노드가 사용하는 정규화된 메시지
+            user_message_lower=user_message.lower(),
+            user_id=user_id,
+            conversation_history=conversation_history,
+        )
 
+    @staticmethod
+    def _format_result(final_state: dict) -> dict:
+        """그래프 최종 상태를 API 응답 형식으로 변환"""
         return {
             "message": final_state["ai_response"] or "",
             "sentiment_score": final_state["sentiment_score"],
@@ -397,14 +551,185 @@ IMPORTANT: Always respond in Korean. Use natural, warm Korean language."""
             "is_crisis": final_state["crisis_detected"],
         }
 
+    def _trivial_message_result(self, user_message: str,
+                                conversation_history: list | None = None) -> dict | None:
+        """빈 메시지나 대화 첫 인사말이면 LLM 호출 없이 기본 응답 반환
+
+        대화 중의 "안녕"은 작별 인사일 수 있으므로 인사말 처리는 대화 이력이 없을 때만 적용합니다.
+        위기 감지는 항상 수행하며, 위기 신호가 있으면 None을 반환해 전체 워크플로우를 실행합니다.
+        """
+        stripped = user_message.strip()
+        normalized = stripped.lower().rstrip("!?.~ ")
+        is_greeting = not conversation_history and normalized in GREETINGS
+        if len(stripped) >= 2 and not is_greeting:
+            return None
+
+        is_crisis, risk_level = self.crisis_detector.detect_crisis(stripped)
+        if is_crisis:
+            return None
+
+        sentiment_score, _ = self.sentiment_analyzer.analyze(stripped)
+        return {
+            "message": GREETING_RESPONSE if is_greeting else TRIVIAL_MESSAGE_RESPONSE,
+            "sentiment_score": sentiment_score,
+            "risk_level": risk_level,
+            "is_crisis": False,
+        }
+
+    def process(self, user_message: str, user_id: str | None = None, 
+                conversation_history: list | None = None) -> dict:
+        """워크플로우 실행"""
+        trivial_result = self._trivial_message_result(user_message, conversation_history)
+        if trivial_result is not None:
+            return trivial_result
+
+        initial_state = self._initial_state(user_message, user_id, conversation_history)
+
+        # 그래프 실행
+        final_state = self.graph.invoke(initial_state)
+
+        return self._format_result(final_state)
+
+    async def aprocess(self, user_message: str, user_id: str | None = None,
+                       conversation_history: list | None = None) -> dict:
+        """워크플로우 실행 (비동기)"""
+        trivial_result = self._trivial_message_result(user_message, conversation_history)
+        if trivial_result is not None:
+            return trivial_result
+
+        initial_state = self._initial_state(user_message, user_id, conversation_history)
+
+        # 그래프 실행 (LLM 호출 동안 이벤트 루프를 점유하지 않음)
+        final_state = await self.graph.ainvoke(initial_state)
+
+        return self._format_result(final_state)
+
+    async def astream_process(self, user_message: str, user_id: str | None = None,
+                              conversation_history: list | None = None) -> AsyncIterator[dict]:
+        """워크플로우를 스트리밍 방식으로 실행
+
+        위기 감지/감정 분석을 먼저 수행한 뒤 챗봇 응답(위기 상황에서는 위기 응답)을 토큰 단위로 전달하고,
+        노래 추천과 위기 안내 메시지는 응답이 끝난 후 이어서 전달합니다.
+
+        Yields:
+            {"type": "token", "content": ...} 형식의 부분 응답,
+            마지막으로 {"type": "done", "sentiment_score": ..., "risk_level": ..., "is_crisis": ...}
+        """
+        trivial_result = self._trivial_message_result(user_message, conversation_history)
+        if trivial_result is not None:
+            yield {"type": "token", "content": trivial_result["message"]}
+            yield {
+                "type": "done",
+                "sentiment_score": trivial_result["sentiment_score"],
+                "risk_level": trivial_result["risk_level"],
+                "is_crisis": trivial_result["is_crisis"],
+            }
+            return
+
+        state = self._initial_state(user_message, user_id, conversation_history)
+        state = replace(state, **self._detect_crisis_node(state))
+        state = replace(state, **self._analyze_sentiment_node(state))
+
+        sentiment_score = state.sentiment_score
+        is_crisis = state.is_crisis
+        risk_level = state.risk_level
+
+        is_crisis_response = is_crisis and risk_level in HIGH_RISK_LEVELS
+
+        # 노래 추천은 응답 스트리밍과 동시에 생성 (위기 상황에서는 추천하지 않음)
+        music_task = None
+        if not is_crisis_response and self._should_recommend_music(user_message, sentiment_score):
+            music_task = asyncio.create_task(
+                self._agenerate_music_recommendation(user_message, sentiment_score)
+            )
+
+        try:
+            try:
+                if is_crisis_response:
+                    response_stream = self._astream_crisis_response(user_message, risk_level, conversation_history)
+                else:
+                    response_stream = self.chatbot.astream_response(user_message, conversation_history)
+
+                async for chunk in response_stream:
+                    yield {"type": "token", "content": chunk}
+            except Exception as e:
+                if music_task:
+                    music_task.cancel()
+                    music_task = None
+                yield {"type": "token", "content": f"죄송합니다. 오류가 발생했습니다: {str(e)}"}
+
+            if music_task:
+                music_recommendation = await music_task
+                if music_recommendation:
+                    yield {"type": "token", "content": f"\n\n{music_recommendation}"}
+
+            # 위기 처리 노드와 동일하게 응답 끝에 위기 안내 메시지 추가
+            if self._should_handle_crisis(state) == "crisis":
+                yield {"type": "token", "content": f"\n\n{self._get_crisis_message(risk_level)}"}
+
+            yield {
+                "type": "done",
+                "sentiment_score": sentiment_score,
+                "risk_level": risk_level,
+                "is_crisis": state.crisis_detected,
+            }
+        finally:
+            # 클라이언트 연결이 끊긴 경우 남은 노래 추천 작업 정리
+            if music_task and not music_task.done():
+                music_task.cancel()
+
+    async def aprocess_batch(self, requests: list[dict], max_concurrency: int = 16) -> list[dict]:
+        """여러 사용자 세션의 워크플로우를 동시에 실행
+
+        Args:
+            requests: user_message, user_id, conversation_history 키를 가진 요청 목록
+            max_concurrency: 동시에 실행할 최대 워크플로우 수
+
+        Returns:
+            요청과 같은 순서의 처리 결과 목록
+        """
+        results: list[dict | None] = [
+            self._trivial_message_result(
+                request["user_message"], request.get("conversation_history")
+            )
+            for request in requests
+        ]
+        pending = [index for index, result in enumerate(results) if result is None]
+
+        if pending:
+            initial_states = [
+                self._initial_state(
+                    requests[index]["user_message"],
+                    requests[index].get("user_id"),
+                    requests[index].get("conversation_history"),
+                )
+                for index in pending
+            ]
+
+            final_states = await self.graph.abatch(
+                initial_states, config={"max_concurrency": max_concurrency}
+            )
+
+            for index, final_state in zip(pending, final_states):
+                results[index] = self._format_result(final_state)
+
+        return results
+
+
+@lru_cache(maxsize=1)
+def get_mindmate_graph() -> MindMateGraph:
+    """프로세스 전체에서 공유하는 기본 MindMateGraph
+
+    그래프 컴파일과 캐시 로드를 한 번만 수행하도록 API 서버와 LangGraph CLI가 같은 인스턴스를 사용합니다.
+    """
+    return MindMateGraph()
+
 
 # LangGraph CLI를 위한 그래프 export
 def create_graph():
     """LangGraph CLI를 위한 그래프 생성 함수"""
-    graph_instance = MindMateGraph()
-    return graph_instance.graph
+    return get_mindmate_graph().graph
 
 
 # 기본 그래프 export (LangGraph CLI 사용)
 graph = create_graph()
-
@@ -0,0 +1,202 @@
+"""
+임베딩 기반 시맨틱 응답 캐시
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+# 선택적 의존성: 설치되어 있지 않으면 캐시가 비활성화됩니다
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    faiss = None
+    np = None
+    SentenceTransformer = None
+
+logger = logging.getLogger(f"mindmate.{__name__}")
+
+
+# 한국어를 지원하는 다국어 문장 임베딩 모델
+EMBEDDING_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# 캐시 적중으로 판단할 코사인 유사도 임계값
+SIMILARITY_THRESHOLD = 0.92
+
+# 기본 캐시 저장 경로
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".semantic_cache"
+
+# 새 항목이 이 수만큼 쌓일 때마다 디스크에 저장 (나머지는 flush()에서 저장)
+SAVE_INTERVAL = 50
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    """임베딩 모델을 프로세스당 한 번만 로드"""
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+def context_key(history: Optional[Sequence]) -> str:
+    """LLM에 함께 전달하는 대화 이력 전체의 해시 (문맥이 다른 캐시 항목을 구분하기 위해 사용)
+
+    마지막 턴만 비교하면 그 앞의 이력이 다른 대화에도 응답이 재사용되므로,
+    프롬프트에 포함되는 메시지의 타입과 내용을 모두 해시합니다.
+    """
+    if not history:
+        return ""
+    digest = hashlib.sha1()
+    for message in history:
+        digest.update(str(getattr(message, "type", "")).encode("utf-8"))
+        digest.update(b"\x1f")
+        digest.update(str(getattr(message, "content", "")).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class SemanticCache:
+    """사용자 메시지의 의미 유사도를 기반으로 LLM 응답을 재사용하는 캐시
+
+    FAISS 내적 인덱스에 정규화된 임베딩을 저장하고, 유사도가 임계값을 넘는
+    이전 메시지가 있으면 저장된 응답을 반환합니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        threshold: float = SIMILARITY_THRESHOLD,
+        search_k: int = 5,
+        max_entries: Optional[int] = None,
+        save_interval: int = SAVE_INTERVAL,
+    ):
+        self.enabled = faiss is not None
+        self.threshold = threshold
+        self.search_k = search_k
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.entries: List[dict] = []  # 인덱스와 같은 순서의 {prompt, context, response}
+        self.index = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 디스크 쓰기 직렬화 (조회/추가는 막지 않음)
+        self._unsaved = 0  # 마지막 저장 이후 추가된 항목 수
+
+        if self.enabled:
+            self._load()
+
+    @property
+    def _index_path(self) -> Optional[Path]:
+        return self.cache_dir / "index.faiss" if self.cache_dir else None
+
+    @property
+    def _entries_path(self) -> Optional[Path]:
+        return self.cache_dir / "entries.json" if self.cache_dir else None
+
+    def _load(self):
+        """디스크에 저장된 캐시 복원 (없으면 빈 인덱스 생성)"""
+        if self._index_path and self._index_path.exists() and self._entries_path.exists():
+            try:
+                self.index = faiss.read_index(str(self._index_path))
+                self.entries = json.loads(self._entries_path.read_text(encoding="utf-8"))
+                if self.index.ntotal == len(self.entries):
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ 시맨틱 캐시 로드 오류: {str(e)}")
+
+        dimension = _get_encoder().get_sentence_embedding_dimension()
+        self.index = faiss.IndexFlatIP(dimension)
+        self.entries = []
+
+    def _save(self):
+        """캐시를 디스크에 저장
+
+        인덱스와 항목은 잠금 안에서 메모리로 직렬화만 하고, 파일 쓰기는 잠금 밖에서
+        임시 파일에 쓴 뒤 교체하여 조회가 막히거나 중간에 끊긴 파일이 남지 않도록 합니다.
+        """
+        if not self.cache_dir:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                index_bytes = faiss.serialize_index(self.index).tobytes()
+                entries_text = json.dumps(self.entries, ensure_ascii=False)
+                self._unsaved = 0
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                _atomic_write(self._index_path, index_bytes)
+                _atomic_write(self._entries_path, entries_text.encode("utf-8"))
+            except Exception as e:
+                logger.warning(f"⚠️ 시맨틱 캐시 저장 오류: {str(e)}")
+
+    def flush(self):
+        """아직 저장되지 않은 항목을 디스크에 저장 (서버 종료 시 호출)"""
+        if self.enabled:
+            self._save()
+
+    def embed(self, message: str):
+        """메시지를 L2 정규화된 임베딩으로 변환"""
+        embedding = _get_encoder().encode([message], normalize_embeddings=True)
+        return np.asarray(embedding, dtype="float32")
+
+    def lookup(self, embedding, context: str = "") -> Optional[str]:
+        """유사한 메시지에 대한 캐시된 응답 조회
+
+        Args:
+            embedding: embed()로 생성한 메시지 임베딩
+            context: context_key()로 생성한 대화 이력 해시
+
+        Returns:
+            캐시 적중 시 저장된 응답, 아니면 None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            scores, ids = self.index.search(embedding, min(self.search_k, self.index.ntotal))
+
+            for score, idx in zip(scores[0], ids[0]):
+                if idx < 0 or score < self.threshold:
+                    break
+                entry = self.entries[idx]
+                if entry["context"] == context:
+                    return entry["response"]
+
+        return None
+
+    def add(self, embedding, prompt: str, response: str, context: str = ""):
+        """새 응답을 캐시에 추가"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.index.add(embedding)
+            self.entries.append({"prompt": prompt, "context": context, "response": response})
+
+            # 최대 항목 수를 넘으면 가장 오래된 항목부터 제거
+            if self.max_entries and len(self.entries) > self.max_entries:
+                overflow = len(self.entries) - self.max_entries
+                self.index.remove_ids(np.arange(overflow, dtype="int64"))
+                del self.entries[:overflow]
+
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_interval
+
+        # 매번 전체 인덱스를 다시 쓰지 않고 save_interval개마다 저장
+        if should_save:
+            self._save()
+
+
+def _atomic_write(path: Path, data: bytes):
+    """임시 파일에 쓴 뒤 이름을 바꿔 원자적으로 파일 교체"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
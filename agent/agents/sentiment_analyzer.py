@@ -2,13 +2,53 @@
 감정 분석 모듈
 """
 
+import re
+from functools import lru_cache
 from typing import Tuple
 
 
+# 긍정/부정 감정 어근
+POSITIVE_WORDS = (
+    "좋아",
+    "기쁘",
+    "행복",
+    "만족",
+    "감사",
+    "희망",
+    "기대",
+    "즐거",
+    "편안",
+    "안정",
+)
+NEGATIVE_WORDS = (
+    "슬프",
+    "힘들",
+    "괴로",
+    "무력",
+    "절망",
+    "두려",
+    "불안",
+    "짜증",
+    "우울",
+    "좌절",
+)
+
+# 어근별 점수 (긍정 +1, 부정 -1)
+WORD_SCORES = {
+    **{word: 1 for word in POSITIVE_WORDS},
+    **{word: -1 for word in NEGATIVE_WORDS},
+}
+
+# 모든 어근을 하나의 정규식으로 미리 컴파일 (한글 어근이므로 대소문자 변환 불필요)
+# "불안정"처럼 어근이 겹치는 경우도 모두 찾도록 전방 탐색으로 매칭
+SENTIMENT_PATTERN = re.compile("(?=(" + "|".join(map(re.escape, WORD_SCORES)) + "))")
+
+
 class SentimentAnalyzer:
     """감정 분석기"""
 
     @staticmethod
+    @lru_cache(maxsize=2048)
     def calculate_sentiment(message: str) -> float:
         """감정 점수 계산 (-1 ~ 1)
         
@@ -18,41 +58,13 @@ class SentimentAnalyzer:
         Returns:
             sentiment_score: 감정 점수 (-1: 매우 부정적, 1: 매우 긍정적)
         """
-        message_lower = message.lower()
-
-        positive_words = [
-            "좋아",
-            "기쁘",
-            "행복",
-            "만족",
-            "감사",
-            "희망",
-            "기대",
-            "즐거",
-            "편안",
-            "안정",
-        ]
-        negative_words = [
-            "슬프",
-            "힘들",
-            "괴로",
-            "무력",
-            "절망",
-            "두려",
-            "불안",
-            "짜증",
-            "우울",
-            "좌절",
-        ]
-
-        positive_count = sum(1 for word in positive_words if word in message_lower)
-        negative_count = sum(1 for word in negative_words if word in message_lower)
-
-        if positive_count == 0 and negative_count == 0:
+        # 한 번의 스캔으로 긍정/부정 어근을 모두 찾고, 같은 어근은 한 번만 셈
+        matched_words = set(SENTIMENT_PATTERN.findall(message))
+        if not matched_words:
             return 0.0
 
-        total = positive_count + negative_count
-        sentiment = (positive_count - negative_count) / total
+        # (긍정 수 - 부정 수) / 전체 수
+        sentiment = sum(WORD_SCORES[word] for word in matched_words) / len(matched_words)
 
         return max(-1.0, min(1.0, sentiment))
 
@@ -79,4 +91,3 @@ class SentimentAnalyzer:
         score = SentimentAnalyzer.calculate_sentiment(message)
         label = SentimentAnalyzer.get_sentiment_label(score)
         return score, label
-
@@ -0,0 +1,193 @@
+"""
+사용자 데이터 저장소 (감정 로그, 온보딩 정보, 위험 단어 카운트)
+
+REDIS_URL 환경 변수가 설정되어 있으면 Redis에 저장하여 여러 워커/서버가 같은 데이터를 공유하고,
+설정되어 있지 않으면 프로세스 내 메모리에 저장합니다 (개발용).
+"""
+
+import json
+import logging
+import os
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional
+
+# 선택적 의존성: 설치되어 있지 않으면 인메모리 저장소만 사용 가능합니다
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(f"mindmate.{__name__}")
+
+
+# 사용자별로 보관하는 최대 감정 로그 수
+MAX_MOOD_LOGS = 100
+
+
+class Storage:
+    """저장소 인터페이스
+
+    감정 로그는 사용자별로 최신 순으로 보관하며, 최대 max_mood_logs개를 넘으면
+    가장 오래된 기록부터 제거됩니다.
+    """
+
+    def __init__(self, max_mood_logs: int = MAX_MOOD_LOGS):
+        self.max_mood_logs = max_mood_logs
+
+    async def append_mood(self, user_id: str, mood_data: Dict) -> None:
+        """감정 로그를 맨 앞(최신)에 추가"""
+        raise NotImplementedError
+
+    async def get_moods(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """감정 로그를 최신 순으로 최대 limit개 조회 (limit이 None이면 전체)"""
+        raise NotImplementedError
+
+    async def count_moods(self, user_id: str) -> int:
+        """저장된 감정 로그 수"""
+        raise NotImplementedError
+
+    async def get_onboarding(self, user_id: str) -> Optional[Dict]:
+        """온보딩 정보 조회 (없으면 None)"""
+        raise NotImplementedError
+
+    async def set_onboarding(self, user_id: str, onboarding_data: Dict) -> None:
+        """온보딩 정보 저장"""
+        raise NotImplementedError
+
+    async def delete_onboarding(self, user_id: str) -> None:
+        """온보딩 정보 삭제"""
+        raise NotImplementedError
+
+    async def add_dangerous_words(self, user_id: str, detected_words: Dict[str, int]) -> Dict[str, int]:
+        """위험 단어 카운트를 누적하고 갱신된 사용자 전체 카운트 반환"""
+        raise NotImplementedError
+
+    async def get_dangerous_words(self, user_id: str) -> Dict[str, int]:
+        """사용자의 위험 단어 카운트 조회 (없으면 빈 dict)"""
+        raise NotImplementedError
+
+    async def reset_dangerous_words(self, user_id: str) -> None:
+        """사용자의 위험 단어 카운트 초기화"""
+        raise NotImplementedError
+
+
+class InMemoryStorage(Storage):
+    """프로세스 내 메모리 저장소 (단일 워커 개발용)"""
+
+    def __init__(self, max_mood_logs: int = MAX_MOOD_LOGS):
+        super().__init__(max_mood_logs)
+        self.mood_logs: Dict[str, Deque[Dict]] = defaultdict(lambda: deque(maxlen=self.max_mood_logs))  # 최신 순
+        self.onboarding: Dict[str, Dict] = {}  # user_id -> onboarding_data
+        self.dangerous_words: Dict[str, Dict[str, int]] = defaultdict(dict)  # user_id -> {word: count}
+
+    async def append_mood(self, user_id: str, mood_data: Dict) -> None:
+        # maxlen을 넘으면 가장 오래된 기록이 자동으로 제거됨
+        self.mood_logs[user_id].appendleft(mood_data)
+
+    async def get_moods(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+        user_logs = self.mood_logs.get(user_id, ())
+        if limit is None:
+            return list(user_logs)
+        return list(islice(user_logs, max(limit, 0)))
+
+    async def count_moods(self, user_id: str) -> int:
+        return len(self.mood_logs.get(user_id, ()))
+
+    async def get_onboarding(self, user_id: str) -> Optional[Dict]:
+        return self.onboarding.get(user_id)
+
+    async def set_onboarding(self, user_id: str, onboarding_data: Dict) -> None:
+        self.onboarding[user_id] = onboarding_data
+
+    async def delete_onboarding(self, user_id: str) -> None:
+        self.onboarding.pop(user_id, None)
+
+    async def add_dangerous_words(self, user_id: str, detected_words: Dict[str, int]) -> Dict[str, int]:
+        user_words = self.dangerous_words[user_id]
+        for word, count in detected_words.items():
+            user_words[word] = user_words.get(word, 0) + count
+        return user_words
+
+    async def get_dangerous_words(self, user_id: str) -> Dict[str, int]:
+        return self.dangerous_words.get(user_id, {})
+
+    async def reset_dangerous_words(self, user_id: str) -> None:
+        self.dangerous_words.pop(user_id, None)
+
+
+class RedisStorage(Storage):
+    """Redis 저장소 (멀티 워커/수평 확장용)
+
+    감정 로그는 리스트(LPUSH + LTRIM)로, 온보딩 정보는 JSON 문자열로,
+    위험 단어 카운트는 해시(HINCRBY)로 저장하여 여러 워커가 동시에 갱신해도 누락되지 않습니다.
+    """
+
+    def __init__(self, url: str, max_mood_logs: int = MAX_MOOD_LOGS):
+        super().__init__(max_mood_logs)
+        self.redis = aioredis.Redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _mood_key(user_id: str) -> str:
+        return f"mood:{user_id}"
+
+    @staticmethod
+    def _onboarding_key(user_id: str) -> str:
+        return f"onboarding:{user_id}"
+
+    @staticmethod
+    def _dangerous_words_key(user_id: str) -> str:
+        return f"dangerous_words:{user_id}"
+
+    async def append_mood(self, user_id: str, mood_data: Dict) -> None:
+        key = self._mood_key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lpush(key, json.dumps(mood_data, ensure_ascii=False))
+            pipe.ltrim(key, 0, self.max_mood_logs - 1)
+            await pipe.execute()
+
+    async def get_moods(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+        if limit is not None and limit <= 0:
+            return []
+        end = -1 if limit is None else limit - 1
+        raw_logs = await self.redis.lrange(self._mood_key(user_id), 0, end)
+        return [json.loads(raw) for raw in raw_logs]
+
+    async def count_moods(self, user_id: str) -> int:
+        return await self.redis.llen(self._mood_key(user_id))
+
+    async def get_onboarding(self, user_id: str) -> Optional[Dict]:
+        raw = await self.redis.get(self._onboarding_key(user_id))
+        return json.loads(raw) if raw else None
+
+    async def set_onboarding(self, user_id: str, onboarding_data: Dict) -> None:
+        await self.redis.set(self._onboarding_key(user_id), json.dumps(onboarding_data, ensure_ascii=False))
+
+    async def delete_onboarding(self, user_id: str) -> None:
+        await self.redis.delete(self._onboarding_key(user_id))
+
+    async def add_dangerous_words(self, user_id: str, detected_words: Dict[str, int]) -> Dict[str, int]:
+        key = self._dangerous_words_key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for word, count in detected_words.items():
+                pipe.hincrby(key, word, count)
+            pipe.hgetall(key)
+            results = await pipe.execute()
+        return {word: int(count) for word, count in results[-1].items()}
+
+    async def get_dangerous_words(self, user_id: str) -> Dict[str, int]:
+        user_words = await self.redis.hgetall(self._dangerous_words_key(user_id))
+        return {word: int(count) for word, count in user_words.items()}
+
+    async def reset_dangerous_words(self, user_id: str) -> None:
+        await self.redis.delete(self._dangerous_words_key(user_id))
+
+
+def create_storage(max_mood_logs: int = MAX_MOOD_LOGS) -> Storage:
+    """환경 설정에 맞는 저장소 생성 (REDIS_URL이 있으면 Redis, 없으면 인메모리)"""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        if aioredis is not None:
+            return RedisStorage(redis_url, max_mood_logs)
+        logger.warning("⚠️ REDIS_URL이 설정되어 있지만 redis 패키지가 설치되지 않아 인메모리 저장소를 사용합니다.")
+    return InMemoryStorage(max_mood_logs)
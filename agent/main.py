@@ -4,43 +4,116 @@ LangGraph를 활용한 우울증 관리 AI 백엔드
 """
 
 import os
+import sys
+import asyncio
 import json
-import requests
-from typing import List, Optional, Dict
+import atexit
+import logging
+import logging.handlers
+import queue
+import smtplib
+import time
+import ahocorasick
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from dotenv import load_dotenv
+from langchain_core.caches import InMemoryCache
+from langchain_core.messages import HumanMessage, SystemMessage
 
 # 환경 변수 로드
 load_dotenv()
 
+# 로깅 설정
+# 요청 처리 스레드(이벤트 루프)는 큐에 레코드만 넣고, 실제 출력은 QueueListener 스레드에서 처리
+# agents 모듈의 "mindmate.*" 하위 로거도 이 로거로 전달되어 같은 큐를 사용
+# 모듈이 한 프로세스에서 다시 로드되어도 핸들러/리스너 스레드를 중복으로 추가하지 않음
+logger = logging.getLogger("mindmate")
+_log_listener: Optional[logging.handlers.QueueListener] = None
+if not any(isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers):
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _log_stream_handler = logging.StreamHandler(sys.stdout)
+    _log_stream_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    _log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler)
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
 # OpenAI API 키 확인
 openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
 
+# 노래 추천 LLM 응답 캐시 (프롬프트가 완전히 같은 추천 요청은 OpenAI 요청 없이 응답)
+# 챗봇/위기 응답은 같은 메시지에도 매번 새로 생성해야 하므로 전역 캐시가 아닌 노래 추천 LLM에만 적용
+MUSIC_LLM_CACHE_MAX_ENTRIES = 1000
+
+# 노래 추천 지시사항 (요청마다 바뀌지 않는 내용을 시스템 메시지 앞쪽에 고정하여 입력 토큰을 줄이고
+# OpenAI 프롬프트 캐시가 재사용되도록 함, 요청별 감정 정보만 사용자 메시지로 전달)
+MUSIC_SYSTEM_PROMPT = """너는 음악 추천 전문가야. 사용자의 오늘 감정 상태에 맞는 유튜브 노래를 추천해줘.
+
+요구사항:
+1. 감정 상태에 맞는 노래 3곡
+2. 각 노래의 아티스트명과 곡명을 명확히
+3. 추천 이유는 한 문장
+4. 유튜브 검색 링크 (https://www.youtube.com/results?search_query=아티스트명+곡명)
+
+응답 형식 (3곡 반복):
+1. [아티스트명 - 곡명]
+   추천 이유: ...
+   유튜브 링크: https://www.youtube.com/results?search_query=...
+
+한국어로 응답해줘."""
+MUSIC_MAX_TOKENS = 600
+# 동시에 진행하는 노래 추천 LLM 호출 수 제한 (요청이 몰려도 OpenAI 429/재시도가 연쇄되지 않도록 초과 요청은 대기)
+MUSIC_LLM_SEMAPHORE = asyncio.Semaphore(int(os.getenv("LLM_CONCURRENCY", "16")))
+
 # LangGraph 그래프 및 Agent 로드
 try:
-    from agents.mindmate_graph import MindMateGraph
+    from agents.mindmate_graph import get_mindmate_graph
     from agents.sentiment_analyzer import SentimentAnalyzer
-    from agents.crisis_detector import CrisisDetector
-    mindmate_graph = MindMateGraph()
+    from agents.crisis_detector import RECOMMENDATIONS_BY_RISK_LEVEL, CrisisDetector
+    from agents.storage import create_storage
+    from agents.chatbot_agent import DEFAULT_INITIAL_QUESTION, aclose_http_connections, awarmup_http_clients, get_llm
+    mindmate_graph = get_mindmate_graph()
+    # 요청마다 새로 만들지 않고 공유하는 분석기
+    sentiment_analyzer = SentimentAnalyzer()
+    crisis_detector = CrisisDetector()
+    # 노래 추천용 LLM (연결 풀을 공유하는 클라이언트를 한 번만 생성)
+    # 3곡 추천은 짧은 응답이므로 출력 토큰 수를 제한하여 최악의 경우 생성 시간을 줄임
+    # model_copy는 연결 풀을 공유하는 HTTP 클라이언트를 그대로 재사용
+    MUSIC_LLM = (
+        get_llm("gpt-4o-mini", 0.7)
+        .model_copy(update={"cache": InMemoryCache(maxsize=MUSIC_LLM_CACHE_MAX_ENTRIES)})
+        .bind(max_tokens=MUSIC_MAX_TOKENS)
+    )
+    MUSIC_SYSTEM_MESSAGE = SystemMessage(content=MUSIC_SYSTEM_PROMPT)
 except Exception as e:
-    print(f"⚠️ LangGraph 로드 오류: {e}")
-    print("LangGraph dev 서버가 실행 중인지 확인하세요: uv run langgraph dev")
+    logger.error(f"⚠️ LangGraph 로드 오류: {e}")
+    logger.error("LangGraph dev 서버가 실행 중인지 확인하세요: uv run langgraph dev")
     raise
 
-# 인메모리 데이터 저장소
-mood_logs_storage: Dict[str, List[Dict]] = defaultdict(list)
-onboarding_storage: Dict[str, Dict] = {}  # user_id -> onboarding_data
-dangerous_words_storage: Dict[str, Dict[str, int]] = defaultdict(dict)  # user_id -> {word: count}
+# 감정 로그/온보딩/위험 단어 저장소 (REDIS_URL이 설정되어 있으면 Redis, 없으면 인메모리)
+storage = create_storage()
+
+# 초기 질문 캐시 (사용자 통계는 하루 단위로 천천히 바뀌므로 같은 통계 구간이면 LLM 호출 없이 재사용)
+INITIAL_QUESTION_CACHE_TTL = 3600  # 초
+INITIAL_QUESTION_CACHE_MAX_ENTRIES = 1024
+initial_question_cache: "OrderedDict[tuple, Tuple[float, str]]" = OrderedDict()  # key -> (만료 시각, 질문)
 
 # 위험 단어 목록
-DANGEROUS_WORDS = [
+DANGEROUS_WORDS = (
     "자살", "죽고싶", "죽고 싶", "죽고싶어", "죽고 싶어", "죽고싶다", "죽고 싶다",
     "끝내고싶", "끝내고 싶", "끝내고싶어", "끝내고 싶어",
     "살기 싫", "살기싫", "살기 싫어", "살기싫어", "살기 싫다", "살기싫다",
@@ -53,37 +126,137 @@ DANGEROUS_WORDS = [
     "미안해", "미안", "죄송", "용서",
     "고마워", "고마웠어", "고마웠다",
     "안녕", "잘 지내", "잘 지내줘",
-]
+)
+
+
+def _minimal_dangerous_words(words: tuple) -> tuple:
+    """다른 (더 짧은) 위험 단어를 포함하는 변형을 제외한 최소 단어 목록
+
+    "죽고싶어"는 "죽고싶"으로 이미 감지되므로, 둘 다 세면 한 번의 표현이 두 번 카운트됩니다.
+    """
+    kept = []
+    for word in sorted(words, key=len):
+        if not any(shorter.lower() in word.lower() for shorter in kept):
+            kept.append(word)
+    # 원래 목록 순서 유지
+    return tuple(word for word in words if word in kept)
+
+
+# 실제로 카운트하는 위험 단어 (변형 표현은 기본형으로 한 번만 카운트)
+DANGEROUS_PATTERNS = _minimal_dangerous_words(DANGEROUS_WORDS)
+
+
+def _build_dangerous_words_automaton() -> ahocorasick.Automaton:
+    """위험 단어를 일기 한 번 순회로 모두 세기 위한 Aho-Corasick 오토마톤 생성"""
+    automaton = ahocorasick.Automaton()
+    for order, word in enumerate(DANGEROUS_PATTERNS):
+        automaton.add_word(word.lower(), (order, word))
+    automaton.make_automaton()
+    return automaton
+
+
+DANGEROUS_WORDS_AUTOMATON = _build_dangerous_words_automaton()
+
+# 모든 위험 단어가 한글(비 ASCII 문자)을 포함하면 ASCII로만 된 일기는 스캔할 필요 없음
+DANGEROUS_WORDS_ALL_NON_ASCII = not any(word.isascii() for word in DANGEROUS_PATTERNS)
+# 위험 단어에 대소문자가 있는 문자가 없으면 일기를 소문자로 변환할 필요 없음
+DANGEROUS_WORDS_CASELESS = all(word.lower() == word.upper() for word in DANGEROUS_PATTERNS)
+
+# 지오코딩 기본 좌표 (서울시 강남구의 대략적인 좌표)
+DEFAULT_COORDINATES = (37.4979, 127.0276)
+
+# 주소에 따른 좌표 매핑 (확장 가능, 앞에 있을수록 우선)
+ADDRESS_MAP = {
+    "서울": (37.5665, 126.9780),
+    "강남": (37.4979, 127.0276),
+    "종로": (37.5714, 126.9883),
+    "마포": (37.5484, 126.9022),
+    "부산": (35.1796, 129.0753),
+    "대구": (35.8714, 128.5956),
+    "인천": (37.4563, 126.7052),
+    "대전": (36.3504, 127.3845),
+    "광주": (35.1595, 126.8526),
+    "울산": (35.5384, 129.3114),
+}
+
+
+def _build_address_automaton() -> ahocorasick.Automaton:
+    """도시명을 주소 한 번 순회로 찾기 위한 Aho-Corasick 오토마톤 생성"""
+    automaton = ahocorasick.Automaton()
+    for priority, (city, coordinates) in enumerate(ADDRESS_MAP.items()):
+        automaton.add_word(city, (priority, coordinates))
+    automaton.make_automaton()
+    return automaton
+
+
+ADDRESS_AUTOMATON = _build_address_automaton()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작 시 그래프/분석기/임베딩 모델과 OpenAI 연결을 미리 준비하여 첫 요청 지연 제거, 종료 시 캐시 저장/HTTP 연결 정리"""
+    try:
+        await mindmate_graph.awarmup()
+    except Exception as e:
+        logger.warning(f"⚠️ 워밍업 오류: {str(e)}")
+    try:
+        await awarmup_http_clients()
+    except Exception as e:
+        logger.warning(f"⚠️ OpenAI 연결 워밍업 오류: {str(e) or type(e).__name__}")
+    yield
+    # 종료 시 시맨틱 캐시의 남은 항목 저장 및 공유 OpenAI HTTP 연결 정리
+    try:
+        await asyncio.to_thread(mindmate_graph.flush_caches)
+    except Exception as e:
+        logger.warning(f"⚠️ 시맨틱 캐시 저장 오류: {str(e)}")
+    await aclose_http_connections()
+
 
 # FastAPI 앱 생성
 app = FastAPI(
     title="MindMate AI Agent",
     description="AI 기반 우울증 관리 시스템 백엔드 API (LangGraph 사용)",
     version="0.1.0",
+    lifespan=lifespan,
+    # 모든 JSON 응답을 orjson으로 직렬화
+    default_response_class=ORJSONResponse,
 )
 
 # CORS 설정
+# 허용 목록을 명시하면 preflight 요청 헤더를 그대로 반사하지 않고 고정된 응답을 사용하며,
+# max_age 동안 브라우저가 preflight 결과를 캐시합니다
+CORS_ALLOWED_ORIGINS = frozenset({
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "http://localhost:3001",
+    "http://127.0.0.1:3001",
+})
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000", 
-        "http://127.0.0.1:3000",
-        "http://localhost:3001",
-        "http://127.0.0.1:3001",
-    ],
+    allow_origins=CORS_ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
+# 응답 압축 (노래 추천 등 긴 한국어 텍스트 응답의 전송량 감소)
+# 작은 응답은 압축하지 않으며, SSE(text/event-stream) 응답은 Starlette가 압축 대상에서 제외합니다
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
 
 # Pydantic 모델 정의
+# 채팅 요청은 대화 이력만큼 반복 검증되므로 알 수 없는 필드를 허용하지 않아 검증 경로를 단순화
 class ChatMessage(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     role: str = Field(..., description="메시지 역할: user, assistant, system")
     content: str = Field(..., description="메시지 내용")
 
 
 class ChatRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     message: str = Field(..., description="사용자 메시지")
     conversation_history: Optional[List[ChatMessage]] = Field(
         default=None, description="대화 이력"
@@ -91,6 +264,18 @@ class ChatRequest(BaseModel):
     user_id: Optional[str] = Field(default=None, description="사용자 ID")
 
 
+# 배치 요청 한 번에 처리하는 최대 세션 수 (한 요청이 LLM 워크플로우를 무제한으로 실행하지 않도록 제한)
+MAX_BATCH_REQUESTS = 32
+
+
+class ChatBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    requests: List[ChatRequest] = Field(
+        ..., max_length=MAX_BATCH_REQUESTS, description="사용자 세션별 챗봇 요청 목록"
+    )
+
+
 class ChatResponse(BaseModel):
     message: str = Field(..., description="AI 응답 메시지")
     sentiment_score: Optional[float] = Field(
@@ -173,7 +358,8 @@ async def test_music_endpoint():
         "message": "노래 추천 엔드포인트가 정상적으로 등록되었습니다.",
         "endpoints": {
             "test": "/api/music/test (GET)",
-            "recommend": "/api/music/recommend (POST)"
+            "recommend": "/api/music/recommend (POST)",
+            "recommend_stream": "/api/music/recommend/stream (POST, SSE)"
         }
     }
 
@@ -182,19 +368,12 @@ async def test_music_endpoint():
 async def send_chat_message(request: ChatRequest):
     """챗봇 메시지 전송 및 응답"""
     try:
-        # 대화 이력을 dict 형식으로 변환
-        conversation_history = None
-        if request.conversation_history:
-            conversation_history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in request.conversation_history
-            ]
-
-        # LangGraph를 통한 워크플로우 실행
-        result = mindmate_graph.process(
+        # LangGraph를 통한 워크플로우 실행 (LLM 호출 동안 이벤트 루프를 막지 않도록 비동기 실행)
+        result = await mindmate_graph.aprocess(
             user_message=request.message,
             user_id=request.user_id,
-            conversation_history=conversation_history,
+            # ChatMessage 목록을 dict로 다시 변환하지 않고 그대로 전달
+            conversation_history=request.conversation_history,
         )
 
         return ChatResponse(
@@ -204,7 +383,56 @@ async def send_chat_message(request: ChatRequest):
             is_crisis=result["is_crisis"],
         )
     except Exception as e:
-        print(f"❌ 챗봇 오류: {str(e)}")
+        logger.exception(f"❌ 챗봇 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"챗봇 오류: {str(e)}")
+
+
+@app.post("/api/chatbot/send-message/stream")
+async def stream_chat_message(request: ChatRequest):
+    """챗봇 응답을 SSE(Server-Sent Events)로 스트리밍"""
+    async def event_stream():
+        try:
+            async for event in mindmate_graph.astream_process(
+                user_message=request.message,
+                user_id=request.user_id,
+                conversation_history=request.conversation_history,
+            ):
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            logger.exception(f"❌ 챗봇 스트리밍 오류: {str(e)}")
+            error_event = {"type": "error", "detail": f"챗봇 오류: {str(e)}"}
+            yield f"data: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/api/chatbot/send-message/batch", response_model=List[ChatResponse])
+async def send_chat_messages_batch(request: ChatBatchRequest):
+    """여러 사용자 세션의 챗봇 메시지를 동시에 처리"""
+    try:
+        batch = [
+            {
+                "user_message": chat_request.message,
+                "user_id": chat_request.user_id,
+                "conversation_history": chat_request.conversation_history,
+            }
+            for chat_request in request.requests
+        ]
+
+        # LangGraph 워크플로우를 세션별로 동시에 실행
+        results = await mindmate_graph.aprocess_batch(batch)
+
+        return [
+            ChatResponse(
+                message=result["message"],
+                sentiment_score=result["sentiment_score"],
+                risk_level=result["risk_level"],
+                is_crisis=result["is_crisis"],
+            )
+            for result in results
+        ]
+    except Exception as e:
+        logger.exception(f"❌ 챗봇 배치 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"챗봇 오류: {str(e)}")
 
 
@@ -212,8 +440,7 @@ async def send_chat_message(request: ChatRequest):
 async def analyze_sentiment(request: SentimentAnalysisRequest):
     """감정 분석"""
     try:
-        analyzer = SentimentAnalyzer()
-        sentiment_score, label = analyzer.analyze(request.message)
+        sentiment_score, label = sentiment_analyzer.analyze(request.message)
 
         return {
             "sentiment_score": sentiment_score,
@@ -228,9 +455,9 @@ async def analyze_sentiment(request: SentimentAnalysisRequest):
 async def crisis_alert(alert: CrisisAlert):
     """위기 알림 처리"""
     try:
-        detector = CrisisDetector()
-        is_crisis, risk_level = detector.detect_crisis(alert.message)
-        recommendations = detector.get_crisis_recommendations(risk_level)
+        is_crisis, risk_level = crisis_detector.detect_crisis(alert.message)
+        # detect_crisis는 항상 low/medium/high/critical 중 하나를 반환하므로 미리 조합된 권장사항을 바로 조회
+        recommendations = RECOMMENDATIONS_BY_RISK_LEVEL[risk_level]
 
         response = {
             "crisis_detected": is_crisis,
@@ -246,39 +473,84 @@ async def crisis_alert(alert: CrisisAlert):
 
 def detect_dangerous_words(text: str) -> Dict[str, int]:
     """일기장에서 위험 단어 감지"""
-    if not text:
+    if not text or text.isspace():
+        return {}
+    # ASCII로만 된 일기에는 위험 단어가 있을 수 없음 (str.isascii는 문자열을 순회하지 않음)
+    if DANGEROUS_WORDS_ALL_NON_ASCII and text.isascii():
         return {}
+    if not DANGEROUS_WORDS_CASELESS:
+        text = text.lower()
+    
+    # 모든 위험 단어를 한 번의 순회로 카운트
+    counts = {}
+    for _, match in DANGEROUS_WORDS_AUTOMATON.iter(text):
+        counts[match] = counts.get(match, 0) + 1
+    
+    # DANGEROUS_PATTERNS 순서로 반환
+    return {word: count for (_, word), count in sorted(counts.items())}
+
+
+def get_mood_sentiment(mood_score: int) -> str:
+    """감정 점수(1-10)로부터 sentiment 결정"""
+    if mood_score >= 7:
+        return "positive"
+    elif mood_score <= 4:
+        return "negative"
+    return "neutral"
+
+
+def get_initial_question_cache_key(user_stats: Dict) -> tuple:
+    """초기 질문 캐시 키 생성 (평균 점수는 소수점 첫째 자리로 양자화)"""
+    avg_score = user_stats.get("avg_score", "5.0")
+    try:
+        avg_score = round(float(avg_score), 1)
+    except (TypeError, ValueError):
+        pass
+    return (
+        avg_score,
+        user_stats.get("trend"),
+        user_stats.get("last_mood"),
+        user_stats.get("topics"),
+    )
+
+
+def generate_initial_question_cached(user_stats: Dict) -> str:
+    """TTL/LRU 캐시를 거쳐 초기 질문 생성"""
+    key = get_initial_question_cache_key(user_stats)
+    now = time.monotonic()
+    
+    cached = initial_question_cache.get(key)
+    if cached is not None and cached[0] > now:
+        initial_question_cache.move_to_end(key)
+        return cached[1]
     
-    detected = {}
-    text_lower = text.lower()
+    question = mindmate_graph.chatbot.generate_initial_question(user_stats)
     
-    for word in DANGEROUS_WORDS:
-        count = text_lower.count(word.lower())
-        if count > 0:
-            detected[word] = count
+    # LLM 오류로 기본 질문이 반환된 경우는 캐시하지 않음
+    if question != DEFAULT_INITIAL_QUESTION:
+        initial_question_cache[key] = (now + INITIAL_QUESTION_CACHE_TTL, question)
+        initial_question_cache.move_to_end(key)
+        while len(initial_question_cache) > INITIAL_QUESTION_CACHE_MAX_ENTRIES:
+            initial_question_cache.popitem(last=False)
     
-    return detected
+    return question
 
 
-def count_total_dangerous_words(user_id: str) -> int:
-    """사용자의 총 위험 단어 개수 계산"""
-    total = 0
-    for count in dangerous_words_storage[user_id].values():
-        total += count
-    return total
+def send_smtp_message(host: str, port: int, user: str, password: str, msg: MIMEMultipart) -> None:
+    """SMTP 서버로 이메일 전송 (블로킹 호출이므로 asyncio.to_thread로 실행)"""
+    with smtplib.SMTP(host, port) as server:
+        server.starttls()
+        server.login(user, password)
+        server.send_message(msg)
 
 
 async def send_email_to_guardian(user_id: str, subject: str, message: str, recipient_email: Optional[str] = None) -> bool:
     """보호자에게 이메일 전송"""
     try:
-        import smtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
-        
         # 온보딩 정보에서 보호자 이메일 가져오기
-        onboarding = onboarding_storage.get(user_id)
+        onboarding = await storage.get_onboarding(user_id)
         if not onboarding:
-            print(f"⚠️ 사용자 {user_id}의 온보딩 정보가 없습니다.")
+            logger.warning(f"⚠️ 사용자 {user_id}의 온보딩 정보가 없습니다.")
             return False
         
         guardian_email = recipient_email or onboarding.get("guardianEmail", "")
@@ -286,7 +558,7 @@ async def send_email_to_guardian(user_id: str, subject: str, message: str, recip
         user_name = onboarding.get("name", "사용자")
         
         if not guardian_email:
-            print(f"⚠️ 보호자 이메일이 등록되지 않았습니다.")
+            logger.warning(f"⚠️ 보호자 이메일이 등록되지 않았습니다.")
             return False
         
         # SMTP 설정 (환경 변수에서 가져오기)
@@ -298,10 +570,12 @@ async def send_email_to_guardian(user_id: str, subject: str, message: str, recip
         
         if not SMTP_USER or not SMTP_PASSWORD:
             # SMTP 설정이 없으면 시뮬레이션 모드
-            print(f"📧 [이메일 전송 시뮬레이션] {guardian_name}({guardian_email})에게 전송:")
-            print(f"   제목: {subject}")
-            print(f"   내용: {message}")
-            print(f"   (실제 이메일 전송을 위해서는 SMTP 설정이 필요합니다)")
+            logger.info(
+                f"📧 [이메일 전송 시뮬레이션] {guardian_name}({guardian_email})에게 전송:\n"
+                f"   제목: {subject}\n"
+                f"   내용: {message}\n"
+                f"   (실제 이메일 전송을 위해서는 SMTP 설정이 필요합니다)"
+            )
             return True
         
         # 이메일 생성
@@ -330,26 +604,24 @@ async def send_email_to_guardian(user_id: str, subject: str, message: str, recip
         
         msg.attach(MIMEText(html_body, "html"))
         
-        # 이메일 전송
+        # 이메일 전송 (SMTP 핸드셰이크/전송 동안 이벤트 루프를 막지 않도록 별도 스레드에서 실행)
         try:
-            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
-            server.quit()
+            await asyncio.to_thread(send_smtp_message, SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, msg)
             
-            print(f"✅ [이메일 전송 성공] {guardian_name}({guardian_email})에게 전송 완료")
+            logger.info(f"✅ [이메일 전송 성공] {guardian_name}({guardian_email})에게 전송 완료")
             return True
         except Exception as e:
-            print(f"❌ 이메일 전송 오류: {str(e)}")
+            logger.exception(f"❌ 이메일 전송 오류: {str(e)}")
             # 실패해도 로그는 출력
-            print(f"📧 [이메일 전송 시뮬레이션] {guardian_name}({guardian_email})에게 전송:")
-            print(f"   제목: {subject}")
-            print(f"   내용: {message}")
+            logger.info(
+                f"📧 [이메일 전송 시뮬레이션] {guardian_name}({guardian_email})에게 전송:\n"
+                f"   제목: {subject}\n"
+                f"   내용: {message}"
+            )
             return False
         
     except Exception as e:
-        print(f"❌ 이메일 전송 오류: {str(e)}")
+        logger.exception(f"❌ 이메일 전송 오류: {str(e)}")
         return False
 
 
@@ -358,31 +630,32 @@ async def log_mood(mood: MoodLog):
     """감정 로그 저장 및 위험 단어 감지"""
     mood_data = mood.model_dump()
     mood_data["timestamp"] = datetime.now().isoformat()
-    mood_logs_storage[mood.user_id].append(mood_data)
-    
-    # 최신 순으로 정렬 및 최대 100개까지만 유지
-    mood_logs_storage[mood.user_id].sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    mood_logs_storage[mood.user_id] = mood_logs_storage[mood.user_id][:100]
+    # sentiment는 저장 시 한 번만 계산 (이력/분석 조회 시 재사용)
+    mood_data["sentiment"] = get_mood_sentiment(mood.mood_score)
+    if mood_data.get("notes"):
+        _, mood_data["notes_sentiment"] = sentiment_analyzer.analyze(mood_data["notes"])
+    # 최신 기록을 앞에 추가 (최대 개수를 넘으면 가장 오래된 기록이 제거됨)
+    await storage.append_mood(mood.user_id, mood_data)
     
     # 위험 단어 감지
     notes = mood_data.get("notes", "")
     if notes:
         detected_words = detect_dangerous_words(notes)
         
-        # 위험 단어 카운팅 업데이트
-        for word, count in detected_words.items():
-            dangerous_words_storage[mood.user_id][word] = dangerous_words_storage[mood.user_id].get(word, 0) + count
+        # 위험 단어 카운팅 업데이트 (갱신된 사용자 전체 카운트 반환)
+        user_words = await storage.add_dangerous_words(mood.user_id, detected_words)
         
         # 총 위험 단어 개수 확인 (임계값: 5개 이상)
         # 단, 같은 단어가 3회 이상 반복되거나, 총 5개 이상이면 알림
-        total_dangerous_count = count_total_dangerous_words(mood.user_id)
-        max_repeat_count = max(dangerous_words_storage[mood.user_id].values()) if dangerous_words_storage[mood.user_id] else 0
+        total_dangerous_count = sum(user_words.values())
+        max_repeat_count = max(user_words.values()) if user_words else 0
         
         # 같은 단어가 3회 이상 반복되거나, 총 위험 단어가 5개 이상이면 알림
         if max_repeat_count >= 3 or total_dangerous_count >= 5:
             # 보호자에게 알림 전송
-            user_name = onboarding_storage.get(mood.user_id, {}).get("name", "사용자")
-            guardian_name = onboarding_storage.get(mood.user_id, {}).get("guardianName", "보호자")
+            onboarding = await storage.get_onboarding(mood.user_id) or {}
+            user_name = onboarding.get("name", "사용자")
+            guardian_name = onboarding.get("guardianName", "보호자")
             
             if max_repeat_count >= 3:
                 reason = f"같은 위험 단어가 {max_repeat_count}회 이상 반복 감지되었습니다."
@@ -398,7 +671,7 @@ async def log_mood(mood: MoodLog):
             
             # 가장 많이 감지된 단어 상위 5개
             sorted_words = sorted(
-                dangerous_words_storage[mood.user_id].items(),
+                user_words.items(),
                 key=lambda x: x[1],
                 reverse=True
             )[:5]
@@ -412,55 +685,35 @@ async def log_mood(mood: MoodLog):
             )
             
             # 이메일은 프론트엔드에서 EmailJS로 전송하므로 백엔드에서는 로그만 출력
-            print(f"📧 [위험 신호 감지] {user_name}님의 일기장에서 위험 신호가 감지되었습니다.")
-            print(f"   이메일 전송은 프론트엔드에서 EmailJS를 통해 처리됩니다.")
-            print(f"   보호자: {guardian_name} ({onboarding_storage.get(mood.user_id, {}).get('guardianEmail', '등록되지 않음')})")
+            logger.info(
+                f"📧 [위험 신호 감지] {user_name}님의 일기장에서 위험 신호가 감지되었습니다.\n"
+                f"   이메일 전송은 프론트엔드에서 EmailJS를 통해 처리됩니다.\n"
+                f"   보호자: {guardian_name} ({onboarding.get('guardianEmail', '등록되지 않음')})"
+            )
     
     return {
         "message": "감정 로그가 저장되었습니다",
         "mood_log": mood_data,
         "dangerous_words_detected": detected_words if notes else {},
-        "total_dangerous_count": count_total_dangerous_words(mood.user_id) if notes else 0,
+        "total_dangerous_count": total_dangerous_count if notes else 0,
     }
 
 
 @app.get("/api/mood/history")
 async def get_mood_history(user_id: str, limit: int = 30):
     """감정 이력 조회"""
-    user_logs = mood_logs_storage.get(user_id, [])
-    
-    # 최신 순으로 정렬 후 limit만큼 반환
-    sorted_logs = sorted(user_logs, key=lambda x: x.get("timestamp", ""), reverse=True)[:limit]
+    # 저장소가 이미 최신 순이므로 앞에서부터 limit만큼 반환
+    sorted_logs = await storage.get_moods(user_id, max(limit, 0))
     
     # 날짜 형식 변환 및 sentiment 계산
     history = []
-    analyzer = SentimentAnalyzer()
     for log in sorted_logs:
-        mood_score = log.get("mood_score", 5)
-        notes = log.get("notes", "")
-        
-        # mood_score를 기반으로 sentiment 계산
-        if mood_score >= 7:
-            sentiment = "positive"
-        elif mood_score <= 4:
-            sentiment = "negative"
-        else:
-            sentiment = "neutral"
-        
-        # notes가 있으면 sentiment 분석 수행
-        if notes:
-            try:
-                sentiment_score, sentiment_label = analyzer.analyze(notes)
-                if sentiment_label in ["positive", "negative", "neutral"]:
-                    sentiment = sentiment_label
-            except:
-                pass
-        
+        # notes가 있으면 메모 분석 결과, 없으면 mood_score 기반 sentiment (모두 저장 시 계산됨)
         history.append({
             "date": log.get("timestamp", datetime.now().isoformat()),
-            "score": mood_score,
-            "sentiment": sentiment,
-            "notes": notes,
+            "score": log.get("mood_score", 5),
+            "sentiment": log.get("notes_sentiment") or log["sentiment"],
+            "notes": log.get("notes", ""),
         })
     
     # 날짜순 정렬 (오래된 것부터)
@@ -469,14 +722,14 @@ async def get_mood_history(user_id: str, limit: int = 30):
     return {
         "user_id": user_id,
         "history": history,
-        "total": len(user_logs),
+        "total": await storage.count_moods(user_id),
     }
 
 
 @app.get("/api/mood/analytics")
 async def get_mood_analytics(user_id: str):
     """감정 분석 데이터"""
-    user_logs = mood_logs_storage.get(user_id, [])
+    user_logs = await storage.get_moods(user_id)
     
     if not user_logs:
         return {
@@ -493,19 +746,34 @@ async def get_mood_analytics(user_id: str):
             "message": "데이터가 없습니다",
         }
     
-    # 평균 점수 계산
-    scores = [log.get("mood_score", 5) for log in user_logs]
-    average_score = sum(scores) / len(scores) if scores else 0
+    # 한 번의 순회로 평균 점수, 추세용 최근/이전 7개 점수, 감정 분포를 함께 계산
+    # (저장소가 최신 순이므로 정렬 불필요, sentiment는 저장 시 계산됨)
+    total_score = 0
+    recent_7 = []
+    previous_7 = []
+    sentiment_counts = Counter({"positive": 0, "neutral": 0, "negative": 0})
     
-    # 최근 7일과 그 이전 7일 비교하여 추세 계산
-    sorted_logs = sorted(user_logs, key=lambda x: x.get("timestamp", ""), reverse=True)
-    recent_7 = sorted_logs[:7]
-    previous_7 = sorted_logs[7:14] if len(sorted_logs) > 7 else []
+    for index, log in enumerate(user_logs):
+        mood_score = log.get("mood_score", 5)
+        total_score += mood_score
+        
+        if index < 7:
+            recent_7.append(mood_score)
+        elif index < 14:
+            previous_7.append(mood_score)
+        
+        sentiment_counts[log["sentiment"]] += 1
+        # notes가 있으면 더 정확한 분석
+        if log.get("notes_sentiment"):
+            sentiment_counts[log["notes_sentiment"]] += 1
     
+    average_score = total_score / len(user_logs)
+    
+    # 최근 7일과 그 이전 7일 비교하여 추세 계산
     # 최소 14개 이상의 기록이 있어야 추세 계산 가능
     if len(recent_7) >= 2 and len(previous_7) >= 2:
-        recent_avg = sum(log.get("mood_score", 5) for log in recent_7) / len(recent_7)
-        previous_avg = sum(log.get("mood_score", 5) for log in previous_7) / len(previous_7)
+        recent_avg = sum(recent_7) / len(recent_7)
+        previous_avg = sum(previous_7) / len(previous_7)
         
         if previous_avg > 0:
             trend_percentage = ((recent_avg - previous_avg) / previous_avg) * 100
@@ -523,37 +791,13 @@ async def get_mood_analytics(user_id: str):
         trend = "insufficient_data"
         trend_percentage = 0
     
-    # 감정 분포 계산
-    analyzer = SentimentAnalyzer()
-    sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
-    
-    for log in user_logs:
-        mood_score = log.get("mood_score", 5)
-        notes = log.get("notes", "")
-        
-        if mood_score >= 7:
-            sentiment_counts["positive"] += 1
-        elif mood_score <= 4:
-            sentiment_counts["negative"] += 1
-        else:
-            sentiment_counts["neutral"] += 1
-        
-        # notes가 있으면 더 정확한 분석
-        if notes:
-            try:
-                _, sentiment_label = analyzer.analyze(notes)
-                if sentiment_label in sentiment_counts:
-                    sentiment_counts[sentiment_label] += 1
-            except:
-                pass
-    
     return {
         "user_id": user_id,
         "average_score": round(average_score, 1),
         "trend": trend,
         "trend_percentage": round(trend_percentage, 1),
         "total_records": len(user_logs),
-        "sentiment_distribution": sentiment_counts,
+        "sentiment_distribution": dict(sentiment_counts),
         "message": "분석 완료",
     }
 
@@ -571,7 +815,7 @@ async def get_initial_question(user_id: str):
             "topics": "일상 스트레스, 수면 패턴",
         }
         
-        initial_question = mindmate_graph.chatbot.generate_initial_question(user_stats)
+        initial_question = generate_initial_question_cached(user_stats)
         
         return {
             "question": initial_question,
@@ -585,9 +829,6 @@ async def get_initial_question(user_id: str):
 async def geocode_address(request: LocationRequest):
     """주소를 기반으로 위치 정보 조회 (지오코딩)"""
     try:
-        import requests
-        from urllib.parse import quote
-        
         address = request.address
         
         # 네이버 맵 API를 사용한 지오코딩 (또는 OpenAI의 지오코딩 서비스)
@@ -597,30 +838,11 @@ async def geocode_address(request: LocationRequest):
         # 실제 구현: OpenCage Geocoding API 또는 네이버 지오코딩 API 사용
         # 임시로 기본값 반환 (테스트용)
         
-        # 서울시 강남구의 대략적인 좌표 (예시)
-        latitude = 37.4979  # 기본값
-        longitude = 127.0276  # 기본값
-        
-        # 주소에 따른 좌표 매핑 (확장 가능)
-        address_map = {
-            "서울": (37.5665, 126.9780),
-            "강남": (37.4979, 127.0276),
-            "종로": (37.5714, 126.9883),
-            "마포": (37.5484, 126.9022),
-            "부산": (35.1796, 129.0753),
-            "대구": (35.8714, 128.5956),
-            "인천": (37.4563, 126.7052),
-            "대전": (36.3504, 127.3845),
-            "광주": (35.1595, 126.8526),
-            "울산": (35.5384, 129.3114),
-        }
-        
-        # 주소에서 도시명 추출
-        for city, (lat, lon) in address_map.items():
-            if city in address:
-                latitude = lat
-                longitude = lon
-                break
+        # 주소에서 도시명 추출 (한 번의 순회로 모든 도시명을 찾고, 여러 개면 ADDRESS_MAP 순서 우선)
+        _, (latitude, longitude) = min(
+            (match for _, match in ADDRESS_AUTOMATON.iter(address)),
+            default=(None, DEFAULT_COORDINATES),
+        )
         
         return LocationResponse(
             latitude=latitude,
@@ -628,7 +850,7 @@ async def geocode_address(request: LocationRequest):
             address=address,
         )
     except Exception as e:
-        print(f"❌ 지오코딩 오류: {str(e)}")
+        logger.exception(f"❌ 지오코딩 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"지오코딩 오류: {str(e)}")
 
 
@@ -640,8 +862,7 @@ async def save_onboarding_data(data: OnboardingData):
         onboarding_data["timestamp"] = datetime.now().isoformat()
         user_id = onboarding_data["user_id"]
         
-        # 인메모리 저장소에 저장
-        onboarding_storage[user_id] = onboarding_data
+        await storage.set_onboarding(user_id, onboarding_data)
         
         # 보호자 정보 확인
         guardian_phone = onboarding_data.get("guardianPhone", "112")
@@ -652,7 +873,7 @@ async def save_onboarding_data(data: OnboardingData):
             "onboarding_data": onboarding_data,
         }
     except Exception as e:
-        print(f"❌ 온보딩 저장 오류: {str(e)}")
+        logger.exception(f"❌ 온보딩 저장 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"온보딩 저장 오류: {str(e)}")
 
 
@@ -660,14 +881,15 @@ async def save_onboarding_data(data: OnboardingData):
 async def get_onboarding_data(user_id: str):
     """사용자 온보딩 정보 조회"""
     try:
-        if user_id not in onboarding_storage:
+        onboarding = await storage.get_onboarding(user_id)
+        if onboarding is None:
             raise HTTPException(status_code=404, detail="온보딩 정보가 없습니다")
         
-        return onboarding_storage[user_id]
+        return onboarding
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ 온보딩 조회 오류: {str(e)}")
+        logger.exception(f"❌ 온보딩 조회 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"온보딩 조회 오류: {str(e)}")
 
 
@@ -675,8 +897,8 @@ async def get_onboarding_data(user_id: str):
 async def get_dangerous_words_count(user_id: str = Query(..., description="사용자 ID")):
     """사용자의 위험 단어 카운트 조회"""
     try:
-        user_words = dangerous_words_storage.get(user_id, {})
-        total_count = count_total_dangerous_words(user_id)
+        user_words = await storage.get_dangerous_words(user_id)
+        total_count = sum(user_words.values())
         max_repeat = max(user_words.values()) if user_words else 0
         
         return {
@@ -687,7 +909,7 @@ async def get_dangerous_words_count(user_id: str = Query(..., description="사
             "should_alert": max_repeat >= 3 or total_count >= 5
         }
     except Exception as e:
-        print(f"❌ 위험 단어 조회 오류: {str(e)}")
+        logger.exception(f"❌ 위험 단어 조회 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"조회 오류: {str(e)}")
 
 
@@ -695,13 +917,13 @@ async def get_dangerous_words_count(user_id: str = Query(..., description="사
 async def reset_dangerous_words(user_id: str = Query(..., description="사용자 ID")):
     """사용자의 위험 단어 카운트 리셋 (테스트용)"""
     try:
-        dangerous_words_storage[user_id] = {}
+        await storage.reset_dangerous_words(user_id)
         return {
             "message": "위험 단어 카운트가 리셋되었습니다.",
             "user_id": user_id
         }
     except Exception as e:
-        print(f"❌ 위험 단어 리셋 오류: {str(e)}")
+        logger.exception(f"❌ 위험 단어 리셋 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"리셋 오류: {str(e)}")
 
 
@@ -730,8 +952,8 @@ async def test_email_message(request: TestEmailRequest):
         }
         
         # 임시로 테스트 데이터 저장
-        original_onboarding = onboarding_storage.get("test_user")
-        onboarding_storage["test_user"] = test_onboarding
+        original_onboarding = await storage.get_onboarding("test_user")
+        await storage.set_onboarding("test_user", test_onboarding)
         
         try:
             result = await send_email_to_guardian("test_user", test_subject, test_message, email)
@@ -751,12 +973,12 @@ async def test_email_message(request: TestEmailRequest):
         finally:
             # 원래 데이터 복원
             if original_onboarding:
-                onboarding_storage["test_user"] = original_onboarding
+                await storage.set_onboarding("test_user", original_onboarding)
             else:
-                onboarding_storage.pop("test_user", None)
+                await storage.delete_onboarding("test_user")
         
     except Exception as e:
-        print(f"❌ 이메일 테스트 오류: {str(e)}")
+        logger.exception(f"❌ 이메일 테스트 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"테스트 오류: {str(e)}")
 
 
@@ -767,176 +989,185 @@ class MusicRecommendationRequest(BaseModel):
     )
 
 
-@app.post("/api/music/recommend")
-async def recommend_music(request: MusicRecommendationRequest):
-    """오늘의 감정을 분석하여 유튜브 노래 추천"""
-    try:
-        from datetime import datetime, timedelta
-        
-        user_id = request.user_id
-        
-        # 오늘의 감정 데이터 가져오기
-        user_logs = mood_logs_storage.get(user_id, [])
-        if not user_logs:
+async def prepare_music_recommendation(request: MusicRecommendationRequest) -> Tuple[Dict, str]:
+    """오늘의 감정 정보와 노래 추천 프롬프트 생성
+
+    Returns:
+        (응답에 포함할 감정 정보, LLM에 보낼 추천 프롬프트)
+        감정 기록과 대화 이력이 모두 없으면 404 HTTPException 발생
+    """
+    user_id = request.user_id
+    
+    # 오늘의 감정 데이터 가져오기
+    user_logs = await storage.get_moods(user_id)
+    if not user_logs:
+        raise HTTPException(
+            status_code=404,
+            detail="오늘 기록된 감정 데이터가 없습니다. 먼저 감정을 기록해주세요."
+        )
+    
+    # 오늘 날짜의 기록 찾기
+    # timestamp는 저장 시 ISO 형식으로 기록되므로 앞 10자리(YYYY-MM-DD)만 비교 (로그마다 파싱하지 않음)
+    today = datetime.now().date().isoformat()
+    today_logs = [log for log in user_logs if log.get("timestamp", "")[:10] == today]
+    
+    # 감정 데이터가 없으면 대화 내용을 분석
+    mood_score = 5  # 기본값
+    notes = ""
+    use_conversation = False
+    
+    if not today_logs:
+        # 대화 이력이 있으면 사용자 메시지 중 최근 5개를 분석 (빈 메시지 제외)
+        recent_messages = [
+            msg.content for msg in request.conversation_history or ()
+            if msg.role == "user" and msg.content.strip()
+        ][-5:]
+        if not recent_messages:
             raise HTTPException(
                 status_code=404,
-                detail="오늘 기록된 감정 데이터가 없습니다. 먼저 감정을 기록해주세요."
+                detail="오늘 기록된 감정 데이터가 없습니다. 먼저 감정을 기록하거나 대화를 나눠주세요."
             )
-        
-        # 오늘 날짜의 기록 찾기
-        today = datetime.now().date()
-        today_logs = []
-        
-        for log in user_logs:
-            try:
-                log_date_str = log.get("timestamp", "")
-                if log_date_str:
-                    # ISO 형식 파싱 시도
-                    if "T" in log_date_str:
-                        log_date = datetime.fromisoformat(log_date_str.replace("Z", "+00:00")).date()
-                    else:
-                        log_date = datetime.strptime(log_date_str.split("T")[0], "%Y-%m-%d").date()
-                    if log_date == today:
-                        today_logs.append(log)
-            except:
-                continue
-        
-        # 감정 데이터가 없으면 대화 내용을 분석
-        mood_score = 5  # 기본값
-        notes = ""
-        use_conversation = False
-        
-        if not today_logs:
-            # 대화 이력이 있으면 그것을 분석
-            if request.conversation_history and len(request.conversation_history) > 0:
-                # 사용자 메시지만 추출
-                user_messages = [
-                    msg.content for msg in request.conversation_history 
-                    if msg.role == "user" and msg.content and msg.content.strip()
-                ]
-                if user_messages:
-                    # 최근 5개 메시지 사용 (빈 메시지 제외)
-                    recent_messages = [msg for msg in user_messages[-5:] if msg.strip()]
-                    if recent_messages:
-                        notes = " ".join(recent_messages)
-                        use_conversation = True
-                    else:
-                        raise HTTPException(
-                            status_code=404,
-                            detail="오늘 기록된 감정 데이터가 없습니다. 먼저 감정을 기록하거나 대화를 나눠주세요."
-                        )
-                else:
-                    raise HTTPException(
-                        status_code=404,
-                        detail="오늘 기록된 감정 데이터가 없습니다. 먼저 감정을 기록하거나 대화를 나눠주세요."
-                    )
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail="오늘 기록된 감정 데이터가 없습니다. 먼저 감정을 기록하거나 대화를 나눠주세요."
-                )
-        else:
-            # 가장 최근 기록 사용
-            latest_log = sorted(today_logs, key=lambda x: x.get("timestamp", ""), reverse=True)[0]
-            mood_score = latest_log.get("mood_score", 5)
-            notes = latest_log.get("notes", "")
-        
-        # 감정 분석
-        analyzer = SentimentAnalyzer()
-        sentiment_score = None
-        sentiment_label = "neutral"
-        
-        if notes:
-            try:
-                sentiment_score, sentiment_label = analyzer.analyze(notes)
-            except:
-                pass
-        
-        # 대화 내용 기반이면 감정 점수를 분석 결과로 업데이트
-        if use_conversation and sentiment_score is not None:
-            # sentiment_score를 1-10 스케일로 변환
-            mood_score = int((sentiment_score + 1) * 5)  # -1~1을 0~10으로 변환
-            mood_score = max(1, min(10, mood_score))  # 1-10 범위로 제한
-        
-        # mood_score 기반 감정 판단
-        if mood_score >= 7:
-            mood_state = "긍정적이고 기분이 좋은"
-            mood_description = f"기분이 매우 좋은 상태 (점수: {mood_score}/10)"
-        elif mood_score <= 4:
-            mood_state = "우울하거나 슬픈"
-            mood_description = f"기분이 좋지 않은 상태 (점수: {mood_score}/10)"
-        else:
-            mood_state = "평온하거나 중립적인"
-            mood_description = f"보통 기분 상태 (점수: {mood_score}/10)"
-        
-        # 대화 내용 기반이면 설명 추가
-        if use_conversation:
-            mood_description += " (대화 내용 분석 기반)"
-        
-        # AI에게 노래 추천 요청
-        from langchain_openai import ChatOpenAI
-        from langchain_core.messages import HumanMessage, SystemMessage
-        
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-        
-        recommendation_prompt = f"""사용자의 오늘 감정 상태를 분석하여 유튜브에서 들을 수 있는 노래를 추천해줘.
-
-사용자 감정 정보:
+        notes = " ".join(recent_messages)
+        use_conversation = True
+    else:
+        # 가장 최근 기록 사용
+        latest_log = max(today_logs, key=lambda x: x.get("timestamp", ""))
+        mood_score = latest_log.get("mood_score", 5)
+        notes = latest_log.get("notes", "")
+    
+    # 감정 분석
+    sentiment_score = None
+    sentiment_label = "neutral"
+    
+    if notes:
+        try:
+            sentiment_score, sentiment_label = sentiment_analyzer.analyze(notes)
+        except:
+            pass
+    
+    # 대화 내용 기반이면 감정 점수를 분석 결과로 업데이트
+    if use_conversation and sentiment_score is not None:
+        # sentiment_score를 1-10 스케일로 변환
+        mood_score = int((sentiment_score + 1) * 5)  # -1~1을 0~10으로 변환
+        mood_score = max(1, min(10, mood_score))  # 1-10 범위로 제한
+    
+    # mood_score 기반 감정 판단
+    if mood_score >= 7:
+        mood_state = "긍정적이고 기분이 좋은"
+        mood_description = f"기분이 매우 좋은 상태 (점수: {mood_score}/10)"
+    elif mood_score <= 4:
+        mood_state = "우울하거나 슬픈"
+        mood_description = f"기분이 좋지 않은 상태 (점수: {mood_score}/10)"
+    else:
+        mood_state = "평온하거나 중립적인"
+        mood_description = f"보통 기분 상태 (점수: {mood_score}/10)"
+    
+    # 대화 내용 기반이면 설명 추가
+    if use_conversation:
+        mood_description += " (대화 내용 분석 기반)"
+    
+    # AI에게 보낼 감정 정보 (추천 지시사항은 MUSIC_SYSTEM_PROMPT)
+    recommendation_prompt = f"""사용자 감정 정보:
 - 감정 점수: {mood_score}/10
 - 감정 상태: {mood_state}
 - 감정 설명: {mood_description}
 - 일기 내용: {notes if notes else "일기 없음"}
-- 감정 분석 결과: {sentiment_label} (점수: {sentiment_score if sentiment_score else "N/A"})
+- 감정 분석 결과: {sentiment_label} (점수: {sentiment_score if sentiment_score else "N/A"})"""
 
-요구사항:
-1. 감정 상태에 맞는 노래를 3곡 추천해줘
-2. 각 노래마다 아티스트명과 곡명을 명확히 알려줘
-3. 각 노래에 대한 간단한 추천 이유를 한 문장으로 설명해줘
-4. 유튜브 검색 링크 형식으로 제공해줘 (예: https://www.youtube.com/results?search_query=아티스트명+곡명)
-
-응답 형식:
-1. [아티스트명 - 곡명]
-   추천 이유: ...
-   유튜브 링크: https://www.youtube.com/results?search_query=...
-
-2. [아티스트명 - 곡명]
-   추천 이유: ...
-   유튜브 링크: https://www.youtube.com/results?search_query=...
+    mood_info = {
+        "mood_score": mood_score,
+        "mood_state": mood_state,
+        "sentiment": sentiment_label,
+    }
+    return mood_info, recommendation_prompt
 
-3. [아티스트명 - 곡명]
-   추천 이유: ...
-   유튜브 링크: https://www.youtube.com/results?search_query=...
 
-한국어로 응답해줘."""
+@app.post("/api/music/recommend")
+async def recommend_music(request: MusicRecommendationRequest):
+    """오늘의 감정을 분석하여 유튜브 노래 추천"""
+    try:
+        mood_info, recommendation_prompt = await prepare_music_recommendation(request)
 
-        try:
-            response = llm.invoke([
-                SystemMessage(content="너는 음악 추천 전문가야. 사용자의 감정 상태에 맞는 노래를 추천해줘."),
+        async with MUSIC_LLM_SEMAPHORE:
+            response = await MUSIC_LLM.ainvoke([
+                MUSIC_SYSTEM_MESSAGE,
                 HumanMessage(content=recommendation_prompt),
             ])
-            
-            recommendation_text = response.content
-            
-            return {
-                "success": True,
-                "mood_score": mood_score,
-                "mood_state": mood_state,
-                "sentiment": sentiment_label,
-                "recommendation": recommendation_text,
-                "timestamp": datetime.now().isoformat(),
-            }
-        except Exception as e:
-            print(f"❌ AI 노래 추천 오류: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"노래 추천 생성 오류: {str(e)}")
+        
+        return {
+            "success": True,
+            **mood_info,
+            "recommendation": response.content,
+            "timestamp": datetime.now().isoformat(),
+        }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ 노래 추천 오류: {str(e)}")
+        logger.exception(f"❌ 노래 추천 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"노래 추천 오류: {str(e)}")
 
 
+@app.post("/api/music/recommend/stream")
+async def stream_music_recommendation(request: MusicRecommendationRequest):
+    """노래 추천을 SSE(Server-Sent Events)로 스트리밍
+
+    첫 이벤트로 {"type": "mood", ...} 감정 정보를 보내고, 이후 {"type": "token", "content": ...}
+    부분 응답을, 마지막으로 {"type": "done", "timestamp": ...}를 보냅니다.
+    """
+    # 감정 데이터가 없는 경우는 스트림을 열기 전에 404로 응답
+    try:
+        mood_info, recommendation_prompt = await prepare_music_recommendation(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"❌ 노래 추천 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"노래 추천 오류: {str(e)}")
+
+    async def event_stream():
+        mood_event = {"type": "mood", **mood_info}
+        yield f"data: {json.dumps(mood_event, ensure_ascii=False)}\n\n"
+        try:
+            async with MUSIC_LLM_SEMAPHORE:
+                async for chunk in MUSIC_LLM.astream([
+                    MUSIC_SYSTEM_MESSAGE,
+                    HumanMessage(content=recommendation_prompt),
+                ]):
+                    if chunk.content:
+                        token_event = {"type": "token", "content": chunk.content}
+                        yield f"data: {json.dumps(token_event, ensure_ascii=False)}\n\n"
+            done_event = {"type": "done", "timestamp": datetime.now().isoformat()}
+            yield f"data: {json.dumps(done_event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            logger.exception(f"❌ 노래 추천 스트리밍 오류: {str(e)}")
+            error_event = {"type": "error", "detail": f"노래 추천 오류: {str(e)}"}
+            yield f"data: {json.dumps(error_event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # 저장소를 Redis로 공유할 때만 CPU 코어 수만큼 워커 실행 (인메모리 저장소는 워커마다 분리되므로 1개)
+    default_workers = (os.cpu_count() or 1) if os.getenv("REDIS_URL") else 1
+    workers = int(os.getenv("WEB_CONCURRENCY", default_workers))
+
+    # loop/http="auto"는 uvloop/httptools가 설치되어 있으면 사용하고, 없으면(Windows 등) 기본 구현 사용
+    if workers > 1:
+        # 이미 이 모듈을 실행한 프로세스에서 "main:app"을 넘기면 워커마다 모듈이 다시 실행되므로
+        # uvicorn CLI로 프로세스를 교체하여 각 워커가 모듈을 한 번만 로드하도록 함
+        if _log_listener is not None:
+            _log_listener.stop()
+        os.execv(sys.executable, [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+            "--host", "0.0.0.0",
+            "--port", "8000",
+            "--workers", str(workers),
+            "--loop", "auto",
+            "--http", "auto",
+        ])
+
+    # 단일 워커는 이미 로드된 app을 그대로 실행
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto")